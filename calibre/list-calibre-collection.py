@@ -2,18 +2,28 @@
 # -*- coding: utf-8 -*-
 # Standard library imports
 import argparse
+import asyncio
 import concurrent.futures
+import functools
 import json
 import os
-import html
 import io
 import sys
 import re
 import sqlite3
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
 
 # Third-party imports
 import pdfkit
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -24,12 +34,14 @@ import tempfile
 import platform
 import random
 import smtplib
+import socket
+import time
 from email.message import EmailMessage
 import base64
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+from email.mime.application import MIMEApplication
+from email import policy as email_policy
 import re
 
 # Google Drive API imports
@@ -69,7 +81,7 @@ def test_google_drive_access(google_creds, verbose=False):
     try:
         if not google_creds:
             return False, "No credentials provided. Authentication failed."
-        drive_service = build('drive', 'v3', credentials=google_creds)
+        drive_service = get_drive_service(google_creds)
         about = drive_service.about().get(fields="user,storageQuota").execute()
         files = drive_service.files().list(
             pageSize=1, 
@@ -98,20 +110,49 @@ def test_google_drive_access(google_creds, verbose=False):
             print(error_message)
         return False, error_message
 
+# One Drive service per credentials object: build() refetches and reparses the
+# discovery document on every call, which is pure overhead after the first.
+_drive_service_cache = {}
+_drive_service_cache_lock = threading.Lock()
+
+def get_drive_service(google_creds):
+    with _drive_service_cache_lock:
+        service = _drive_service_cache.get(id(google_creds))
+        if service is None:
+            service = build('drive', 'v3', credentials=google_creds, cache_discovery=False)
+            _drive_service_cache[id(google_creds)] = service
+        return service
+
+# folder name -> folder ID, shared by every search_file_in_drive call
+# (including the parallel formatting workers) so each folder is resolved once
+_folder_id_cache = {}
+_folder_id_cache_lock = threading.Lock()
+
+def _resolve_folder_id(drive_service, folder_name):
+    creds = getattr(getattr(drive_service, '_http', None), 'credentials', None)
+    cache_key = (getattr(creds, 'service_account_email', None), folder_name)
+    with _folder_id_cache_lock:
+        if cache_key in _folder_id_cache:
+            return _folder_id_cache[cache_key]
+    folder_query = f"name = '{folder_name}' and mimeType = 'application/vnd.google-apps.folder' and trashed = false"
+    folder_response = drive_service.files().list(
+        q=folder_query,
+        spaces='drive',
+        fields='files(id, name)',
+        pageSize=1).execute()
+    folders = folder_response.get('files', [])
+    folder_id = folders[0]['id'] if folders else None
+    with _folder_id_cache_lock:
+        _folder_id_cache[cache_key] = folder_id
+    return folder_id
+
 def search_file_in_drive(drive_service, query, max_results=10, folder_name=None, include_shared=True):
     results = []
     page_token = None
     folder_id = None
     if folder_name:
-        folder_query = f"name = '{folder_name}' and mimeType = 'application/vnd.google-apps.folder' and trashed = false"
-        folder_response = drive_service.files().list(
-            q=folder_query,
-            spaces='drive',
-            fields='files(id, name)',
-            pageSize=1).execute()
-        folders = folder_response.get('files', [])
-        if folders:
-            folder_id = folders[0]['id']
+        folder_id = _resolve_folder_id(drive_service, folder_name)
+        if folder_id:
             query = f"{query} and '{folder_id}' in parents"
     while True:
         search_params = {
@@ -142,6 +183,29 @@ def search_file_in_drive(drive_service, query, max_results=10, folder_name=None,
             break
     return results[:max_results]
 
+# Credentials objects aren't hashable, so the memoized resolver below is keyed
+# by id(creds) and looks the real object up here.
+_creds_registry = {}
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_drive_url(creds_id, filename, exact_match, folder_name, return_all):
+    google_creds = _creds_registry.get(creds_id)
+    if not google_creds:
+        return None
+    drive_service = get_drive_service(google_creds)
+    safe_filename = filename.replace("'", "\\'")
+    if exact_match:
+        query = f"name = '{safe_filename}' and trashed = false"
+    else:
+        query = f"name contains '{safe_filename}' and trashed = false"
+    results = search_file_in_drive(drive_service, query, max_results=10 if return_all else 1, folder_name=folder_name)
+    if not results:
+        return None
+    elif return_all:
+        return tuple(item.get('webViewLink') for item in results if 'webViewLink' in item)
+    else:
+        return results[0].get('webViewLink')
+
 def get_drive_url_by_filename(google_creds, filename, exact_match=True, folder_name=None, return_all=False, verbose=False):
     try:
         if verbose:
@@ -150,21 +214,14 @@ def get_drive_url_by_filename(google_creds, filename, exact_match=True, folder_n
             if verbose:
                 print("No valid Google credentials provided")
             return None
-        drive_service = build('drive', 'v3', credentials=google_creds)
-        safe_filename = filename.replace("'", "\\'")
-        if exact_match:
-            query = f"name = '{safe_filename}' and trashed = false"
-        else:
-            query = f"name contains '{safe_filename}' and trashed = false"
-        results = search_file_in_drive(drive_service, query, max_results=10 if return_all else 1, folder_name=folder_name)
-        if verbose:
-            print(f"Found {len(results)} matching files")
-        if not results:
-            return None
-        elif return_all:
-            return [item.get('webViewLink') for item in results if 'webViewLink' in item]
-        else:
-            return results[0].get('webViewLink')
+        # Memoize on (filename, folder, match mode) so repeated lookups of the
+        # same name (common across books) hit the cache instead of the network.
+        # Negative results are cached too.
+        _creds_registry[id(google_creds)] = google_creds
+        result = _resolve_drive_url(id(google_creds), filename, exact_match, folder_name, return_all)
+        if return_all:
+            return list(result) if result is not None else None
+        return result
     except Exception as e:
         print(f"Error accessing Google Drive: {str(e)}", file=sys.stderr)
         return None
@@ -176,17 +233,121 @@ def print_progress(message, verbose=True, level=1, file=sys.stdout):
         file.flush()
 
 # Calibre functions
+def _ensure_link_table_indexes(conn):
+    # The listing queries join/filter on the link tables and sort on
+    # books.timestamp. Calibre ships some of these indexes but not all, and a
+    # metadata.db copy downloaded from Drive may be missing them entirely.
+    # Covering indexes (including the selected columns) let SQLite answer the
+    # joins without touching the table rows.
+    index_statements = [
+        "CREATE INDEX IF NOT EXISTS idx_bal_book ON books_authors_link(book, author, id)",
+        "CREATE INDEX IF NOT EXISTS idx_btl_book ON books_tags_link(book, tag)",
+        "CREATE INDEX IF NOT EXISTS idx_data_book ON data(book, format, name)",
+        "CREATE INDEX IF NOT EXISTS idx_bsl_book ON books_series_link(book, series)",
+        "CREATE INDEX IF NOT EXISTS idx_bpl_book ON books_publishers_link(book, publisher)",
+        "CREATE INDEX IF NOT EXISTS idx_books_timestamp ON books(timestamp DESC)",
+    ]
+    try:
+        for statement in index_statements:
+            conn.execute(statement)
+        conn.commit()
+    except sqlite3.Error:
+        # Read-only or locked databases still work, just without the indexes
+        pass
+
+def _tune_connection(conn):
+    # The listing workload is read-heavy: favor a large page cache, in-memory
+    # temp B-trees and memory-mapped I/O over durable sync journaling.
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA cache_size=-65536",
+    ]
+    try:
+        for pragma in pragmas:
+            conn.execute(pragma)
+    except sqlite3.Error:
+        pass
+
+def _open_calibre_db(db_path):
+    conn = sqlite3.connect(db_path)
+    _tune_connection(conn)
+    _ensure_link_table_indexes(conn)
+    # Everything after this point only reads the database
+    try:
+        conn.execute("PRAGMA query_only=ON")
+    except sqlite3.Error:
+        pass
+    return conn
+
+# Large download chunks cut the number of HTTP round-trips per MB; the default
+# MediaIoBaseDownload chunk is only 100 KB.
+_DOWNLOAD_CHUNK_SIZE = 10 * 1024 * 1024
+
+def _parse_drive_timestamp(value):
+    # Drive returns RFC 3339 timestamps such as 2023-01-01T12:00:00.000Z
+    for fmt in ('%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%SZ'):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+    return None
+
+def _download_metadata_db(drive_service, file_id, temp_db_path, verbose=False):
+    # Skip the download entirely when the cached copy from a previous run
+    # still matches the Drive file's modifiedTime and size.
+    remote_mtime = None
+    try:
+        file_metadata = drive_service.files().get(
+            fileId=file_id, fields='modifiedTime,size').execute()
+        remote_mtime = _parse_drive_timestamp(file_metadata.get('modifiedTime', ''))
+        remote_size = int(file_metadata.get('size', -1))
+        if (remote_mtime is not None and os.path.exists(temp_db_path)
+                and int(os.path.getmtime(temp_db_path)) == int(remote_mtime)
+                and os.path.getsize(temp_db_path) == remote_size):
+            if verbose:
+                print_progress(f"Cached metadata.db at {temp_db_path} is up to date, skipping download", verbose)
+            return temp_db_path
+    except Exception:
+        pass
+    # Spool the download in memory (metadata.db is usually small) and write it
+    # to disk in one go once complete; sqlite3 needs a real file path.
+    request = drive_service.files().get_media(fileId=file_id)
+    with tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024) as spool:
+        downloader = MediaIoBaseDownload(spool, request, chunksize=_DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while not done:
+            status, done = downloader.next_chunk()
+            if verbose:
+                print_progress(f"Download progress: {int(status.progress() * 100)}%", verbose)
+        spool.seek(0)
+        with open(temp_db_path, 'wb') as f:
+            while True:
+                buf = spool.read(1024 * 1024)
+                if not buf:
+                    break
+                f.write(buf)
+    if remote_mtime is not None:
+        # Stamp the cache with the Drive mtime so the next run can compare
+        try:
+            os.utime(temp_db_path, (remote_mtime, remote_mtime))
+        except OSError:
+            pass
+    return temp_db_path
+
 def connect_to_calibre_db(library_path, google_creds=None, verbose=False):
     db_path = os.path.join(library_path, 'metadata.db')
     if os.path.exists(db_path):
-        return sqlite3.connect(db_path)
+        return _open_calibre_db(db_path)
     # If not found locally, try to find in Google Drive
     if google_creds:
         print_progress(f"Local Calibre database not found at {db_path}. Searching in Google Drive...", verbose)
         filename = 'metadata.db'
         # Try to find any folder named "Calibre Library" in Google Drive
         try:
-            drive_service = build('drive', 'v3', credentials=google_creds)
+            drive_service = get_drive_service(google_creds)
             # Search for folders named "Calibre Library"
             folder_query = "name = 'Calibre Library' and mimeType = 'application/vnd.google-apps.folder' and trashed = false"
             folder_response = drive_service.files().list(
@@ -210,16 +371,9 @@ def connect_to_calibre_db(library_path, google_creds=None, verbose=False):
                     file_id = results[0]['id']
                     temp_dir = tempfile.gettempdir()
                     temp_db_path = os.path.join(temp_dir, 'metadata.db')
-                    request = drive_service.files().get_media(fileId=file_id)
-                    with open(temp_db_path, 'wb') as f:
-                        downloader = MediaIoBaseDownload(f, request)
-                        done = False
-                        while not done:
-                            status, done = downloader.next_chunk()
-                            if verbose:
-                                print_progress(f"Download progress: {int(status.progress() * 100)}%", verbose)
+                    _download_metadata_db(drive_service, file_id, temp_db_path, verbose)
                     print_progress(f"Downloaded metadata.db from Google Drive folder '{folder['name']}' to {temp_db_path}", verbose)
-                    return sqlite3.connect(temp_db_path)
+                    return _open_calibre_db(temp_db_path)
             # Fallback: try searching anywhere in Drive (legacy behavior)
             drive_url = get_drive_url_by_filename(google_creds, filename, exact_match=True, folder_name=None, verbose=verbose)
             if drive_url:
@@ -228,16 +382,9 @@ def connect_to_calibre_db(library_path, google_creds=None, verbose=False):
                     file_id = results[0]['id']
                     temp_dir = tempfile.gettempdir()
                     temp_db_path = os.path.join(temp_dir, 'metadata.db')
-                    request = drive_service.files().get_media(fileId=file_id)
-                    with open(temp_db_path, 'wb') as f:
-                        downloader = MediaIoBaseDownload(f, request)
-                        done = False
-                        while not done:
-                            status, done = downloader.next_chunk()
-                            if verbose:
-                                print_progress(f"Download progress: {int(status.progress() * 100)}%", verbose)
+                    _download_metadata_db(drive_service, file_id, temp_db_path, verbose)
                     print_progress(f"Downloaded metadata.db from Google Drive to {temp_db_path}", verbose)
-                    return sqlite3.connect(temp_db_path)
+                    return _open_calibre_db(temp_db_path)
             print_progress("metadata.db not found in any 'Calibre Library' folder or anywhere in Google Drive.", verbose, file=sys.stderr)
         except Exception as e:
             print_progress(f"Failed to download metadata.db from Google Drive: {e}", verbose, file=sys.stderr)
@@ -257,7 +404,12 @@ def _table_has_column(conn, table_name, column_name):
     cursor.execute(f"PRAGMA table_info({table_name})")
     return any(row[1] == column_name for row in cursor.fetchall())
 
-def list_calibre_books(conn, categories=None):
+# Unit/record separators used to pack multi-valued columns into one GROUP_CONCAT
+# cell without colliding with characters that appear in real titles/filenames.
+_FIELD_SEP = "\x1f"
+_RECORD_SEP = "\x1e"
+
+def list_calibre_books(conn, categories=None, book_ids=None):
     cursor = conn.cursor()
     identifiers_table_exists = _table_exists(conn, "identifiers")
     if _table_has_column(conn, "books", "isbn"):
@@ -269,63 +421,127 @@ def list_calibre_books(conn, categories=None):
                      "LIMIT 1) AS isbn")
     else:
         isbn_expr = "NULL AS isbn"
+    # Pull authors, formats and identifiers in the same statement via ordered
+    # GROUP_CONCAT subqueries instead of issuing 2-3 extra queries per book.
+    # The ordered inner SELECTs keep the original per-book ordering.
+    if identifiers_table_exists:
+        identifiers_expr = ("(SELECT GROUP_CONCAT(ident, char(30)) FROM "
+                            "(SELECT type || char(31) || val AS ident FROM identifiers "
+                            "WHERE book = books.id AND type IN ('isbn', 'asin', 'doi') "
+                            "ORDER BY id)) AS identifiers_concat")
+    else:
+        identifiers_expr = "NULL AS identifiers_concat"
     base_query = """
-        SELECT 
-            books.id, books.title, books.path, books.pubdate, {isbn_expr}, 
+        SELECT
+            books.id, books.title, books.path, books.pubdate, {isbn_expr},
             books.series_index AS series_index,
             s.name as series,
             p.name as publisher,
-            books.timestamp
+            books.timestamp,
+            (SELECT GROUP_CONCAT(name, char(31)) FROM
+                (SELECT a.name AS name FROM authors a
+                 JOIN books_authors_link l ON a.id = l.author
+                 WHERE l.book = books.id
+                 ORDER BY l.id)) AS authors_concat,
+            (SELECT GROUP_CONCAT(fmt, char(30)) FROM
+                (SELECT format || char(31) || name AS fmt FROM data
+                 WHERE data.book = books.id)) AS formats_concat,
+            {identifiers_expr}
         FROM books
         LEFT JOIN books_series_link bsl ON books.id = bsl.book
         LEFT JOIN series s ON bsl.series = s.id
         LEFT JOIN books_publishers_link bpl ON books.id = bpl.book
         LEFT JOIN publishers p ON bpl.publisher = p.id
-    """.format(isbn_expr=isbn_expr)
+    """.format(isbn_expr=isbn_expr, identifiers_expr=identifiers_expr)
     params = []
+    use_temp_categories = False
     if categories:
+        # Tag filtering is a case-insensitive substring match in both
+        # directions (category inside tag and tag inside category), pushed
+        # into SQL so only matching books are ever materialized. Callers
+        # pass categories already lowercased. For long lists the patterns
+        # go into a TEMP table instead of one pair of bound parameters
+        # each, which keeps the variable count flat.
+        if len(categories) > 16:
+            try:
+                conn.execute("PRAGMA query_only=OFF")
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS _cats(name TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM _cats")
+                conn.executemany("INSERT OR IGNORE INTO _cats(name) VALUES (?)",
+                                 ((category,) for category in categories))
+                conn.execute("PRAGMA query_only=ON")
+                use_temp_categories = True
+            except sqlite3.Error:
+                use_temp_categories = False
         # Join with tags table to filter by categories (tags)
-        base_query += """
-            JOIN books_tags_link btl ON books.id = btl.book
-            JOIN tags t ON btl.tag = t.id
-            WHERE t.name IN ({})
-        """.format(','.join(['?'] * len(categories)))
-        params.extend(categories)
+        if use_temp_categories:
+            base_query += """
+                JOIN books_tags_link btl ON books.id = btl.book
+                JOIN tags t ON btl.tag = t.id
+                JOIN _cats c ON instr(lower(t.name), c.name) > 0
+                             OR instr(c.name, lower(t.name)) > 0
+            """
+        else:
+            conditions = " OR ".join(
+                ["instr(lower(t.name), ?) > 0 OR instr(?, lower(t.name)) > 0"]
+                * len(categories))
+            base_query += """
+                JOIN books_tags_link btl ON books.id = btl.book
+                JOIN tags t ON btl.tag = t.id
+                WHERE {}
+            """.format(conditions)
+            for category in categories:
+                params.extend((category, category))
+    if book_ids:
+        # Keyed fetch for callers that only need specific books
+        connector = " AND " if (categories and not use_temp_categories) else " WHERE "
+        base_query += connector + "books.id IN ({})".format(','.join(['?'] * len(book_ids)))
+        params.extend(book_ids)
+    if categories:
+        # The tag join emits one row per matching tag; collapse to one
+        # row per book before ordering
+        base_query += " GROUP BY books.id"
     # Order by added time (timestamp), most recent first
     base_query += " ORDER BY books.timestamp DESC"
     cursor.execute(base_query, params)
-    books = cursor.fetchall()
-    # Get authors for each book
-    book_list = []
-    for book in books:
-        book_id, title, path, pubdate, isbn, series_index, series, publisher, timestamp = book
-        cursor.execute("""
-            SELECT a.name FROM authors a
-            JOIN books_authors_link l ON a.id = l.author
-            WHERE l.book = ?
-            ORDER BY l.id
-        """, (book_id,))
-        authors = [row[0] for row in cursor.fetchall()]
-        # Get formats
-        cursor.execute("""
-            SELECT format, name FROM data WHERE book = ?
-        """, (book_id,))
-        formats = [{'format': row[0], 'name': row[1]} for row in cursor.fetchall()]
+    # Stream rows off the cursor instead of materializing the whole library
+    # with fetchall(); downstream consumers can start while the scan runs.
+    cursor.arraysize = 1000
+    try:
+        yield from _book_rows_to_dicts(cursor)
+    finally:
+        if use_temp_categories:
+            try:
+                conn.execute("PRAGMA query_only=OFF")
+                conn.execute("DROP TABLE IF EXISTS _cats")
+                conn.execute("PRAGMA query_only=ON")
+            except sqlite3.Error:
+                pass
 
+def _book_rows_to_dicts(cursor):
+    for book in cursor:
+        (book_id, title, path, pubdate, isbn, series_index, series, publisher,
+         timestamp, authors_concat, formats_concat, identifiers_concat) = book
+        authors = authors_concat.split(_FIELD_SEP) if authors_concat else []
+        # Parallel tuples instead of a list of per-format dicts: far fewer
+        # allocations per book and cheaper to iterate in the formatters
+        format_exts = []
+        format_names = []
+        if formats_concat:
+            for record in formats_concat.split(_RECORD_SEP):
+                fmt, _, name = record.partition(_FIELD_SEP)
+                format_exts.append(fmt)
+                format_names.append(name)
         identifiers = {"isbn": [], "asin": [], "doi": []}
-        if identifiers_table_exists:
-            cursor.execute("""
-                SELECT type, val FROM identifiers
-                WHERE book = ? AND type IN ('isbn', 'asin', 'doi')
-                ORDER BY id
-            """, (book_id,))
-            for ident_type, ident_val in cursor.fetchall():
+        if identifiers_concat:
+            for record in identifiers_concat.split(_RECORD_SEP):
+                ident_type, _, ident_val = record.partition(_FIELD_SEP)
                 if ident_val and ident_type in identifiers:
                     identifiers[ident_type].append(ident_val)
         identifiers = {k: "; ".join(v) for k, v in identifiers.items() if v}
         if not isbn and identifiers.get("isbn"):
             isbn = identifiers["isbn"]
-        book_list.append({
+        yield {
             'id': book_id,
             'title': title,
             'authors': authors,
@@ -337,62 +553,232 @@ def list_calibre_books(conn, categories=None):
             'series': series,
             'series_index': series_index,
             'publisher': publisher,
-            'formats': formats,
+            'format_exts': tuple(format_exts),
+            'format_names': tuple(format_names),
             'timestamp': timestamp
-        })
-    return book_list
+        }
 
-def get_attachment_paths(book, library_path, google_creds=None, verbose=False):
-    attachment_info = []
-    library_path = pathlib.Path(library_path)
-    book_folder = library_path / book['path']
-    for fmt in book['formats']:
-        ext = fmt['format'].lower()
-        # Handle filenames with dots before extension
-        filename = fmt['name']
-        if not filename.lower().endswith(f".{ext}"):
-            filename = f"{filename}.{ext}"
-        local_path = book_folder / filename
-        local_path_str = str(local_path.resolve().as_posix())
-        idx = local_path_str.lower().find("calibre library".lower())
-        if idx != -1:
-            local_path_str = local_path_str[idx:]
-        # Ensure the path ends with the correct extension
-        if not local_path_str.lower().endswith(f".{ext}"):
-            local_path_str = f"{local_path_str}.{ext}"
-        info = {'local_path': local_path_str, 'drive_url': None}
-        if google_creds:
+def _attachment_filename(ext, name):
+    ext = ext.lower()
+    # Handle filenames with dots before extension
+    if not name.lower().endswith(f".{ext}"):
+        name = f"{name}.{ext}"
+    return name
+
+def collect_attachment_filenames(books):
+    """Collect every attachment filename across the given books, deduplicated."""
+    filenames = []
+    seen = set()
+    for book in books:
+        for ext, name in zip(book['format_exts'], book['format_names']):
+            filename = _attachment_filename(ext, name)
+            if filename not in seen:
+                seen.add(filename)
+                filenames.append(filename)
+    return filenames
+
+async def _resolve_drive_urls_async(token, filenames):
+    """
+    Fan out files.list lookups for all filenames on one event loop.
+    A single aiohttp session with a pooled connector overlaps the HTTPS
+    round-trips instead of paying them serially (or one per thread).
+    """
+    url_cache = {}
+    semaphore = asyncio.Semaphore(50)
+
+    async def lookup(session, name):
+        safe_name = name.replace("'", "\\'")
+        base_query = f"name = '{safe_name}' and trashed = false"
+        async with semaphore:
+            # Check owned files first, then shared-with-me (same order as the
+            # synchronous path)
+            for query in (base_query, f"{base_query} and sharedWithMe = true"):
+                params = {
+                    'q': query,
+                    'spaces': 'drive',
+                    'fields': 'files(id, name, webViewLink)',
+                    'pageSize': 1
+                }
+                async with session.get('https://www.googleapis.com/drive/v3/files',
+                                       params=params) as response:
+                    if response.status != 200:
+                        return
+                    data = await response.json()
+                files = data.get('files', [])
+                if files:
+                    file = files[0]
+                    if file.get('webViewLink'):
+                        url_cache.setdefault(name, file['webViewLink'])
+                    return
+
+    connector = aiohttp.TCPConnector(limit=100)
+    headers = {'Authorization': f'Bearer {token}'}
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        await asyncio.gather(*(lookup(session, name) for name in filenames))
+    return url_cache
+
+def precache_drive_urls(google_creds, filenames, verbose=False):
+    """
+    Resolve many filenames to Google Drive webViewLinks in bulk.
+    When aiohttp is available, all lookups are fanned out concurrently on one
+    event loop; otherwise filenames are grouped into chunked OR-queries (~50
+    names per request, to stay under the query length limit), so N lookups
+    cost roughly N/50 HTTP round-trips.
+    Returns a dict mapping filename -> webViewLink (missing files are absent).
+    """
+    url_cache = {}
+    if not google_creds or not filenames:
+        return url_cache
+    if aiohttp is not None:
+        try:
+            if not google_creds.valid:
+                google_creds.refresh(Request())
+            url_cache = asyncio.run(
+                _resolve_drive_urls_async(google_creds.token, filenames))
             if verbose:
-                print_progress(f"Searching for {filename} in Google Drive (own and shared folders)", verbose)
-            try:
-                # Search in both own and shared folders
-                drive_url = get_drive_url_by_filename(
-                    google_creds,
-                    filename,
-                    exact_match=True,
-                    folder_name=None,
-                    return_all=False,
-                    verbose=verbose
-                )
-                if not drive_url:
-                    # Try searching in shared files explicitly if not found
-                    drive_service = build('drive', 'v3', credentials=google_creds)
-                    safe_filename = filename.replace("'", "\\'")
-                    query = f"name = '{safe_filename}' and trashed = false and sharedWithMe = true"
-                    results = search_file_in_drive(drive_service, query, max_results=1, include_shared=True)
-                    if results:
-                        drive_url = results[0].get('webViewLink')
-                if drive_url:
-                    info['drive_url'] = drive_url
-                    if verbose:
-                        print_progress(f"Found Google Drive URL for {filename}", verbose)
-            except Exception as e:
-                if verbose:
-                    print_progress(f"Error searching Google Drive for {filename}: {e}", verbose, file=sys.stderr)
-        attachment_info.append(info)
+                print_progress(
+                    f"Async pass resolved Drive URLs for {len(url_cache)}/{len(filenames)} filenames",
+                    verbose)
+            return url_cache
+        except Exception as e:
+            print_progress(f"Async Drive lookup failed, falling back to batched queries: {e}",
+                           verbose, file=sys.stderr)
+            url_cache = {}
+    try:
+        drive_service = get_drive_service(google_creds)
+        chunk_size = 50
+        for start in range(0, len(filenames), chunk_size):
+            chunk = filenames[start:start + chunk_size]
+            name_clauses = " or ".join(
+                "name = '{}'".format(name.replace("'", "\\'")) for name in chunk
+            )
+            query = f"({name_clauses}) and trashed = false"
+            page_token = None
+            while True:
+                response = drive_service.files().list(
+                    q=query,
+                    spaces='drive',
+                    fields='nextPageToken, files(id, name, webViewLink)',
+                    pageToken=page_token,
+                    pageSize=100
+                ).execute()
+                for file in response.get('files', []):
+                    if file.get('name') and file.get('webViewLink'):
+                        url_cache.setdefault(file['name'], file['webViewLink'])
+                page_token = response.get('nextPageToken')
+                if page_token is None:
+                    break
+            if verbose:
+                print_progress(
+                    f"Resolved Drive URLs for {len(url_cache)}/{start + len(chunk)} filenames",
+                    verbose)
+        # Second pass for anything not found in the owned files: look through
+        # shared-with-me files. sharedWithMe can't be OR-combined with the big
+        # name query, so fold the per-filename lookups into multipart batch
+        # requests (up to 100 calls per HTTP round-trip).
+        missing = [name for name in filenames if name not in url_cache]
+        if missing:
+            def _record(request_id, response, exception):
+                if exception is not None:
+                    return
+                for file in response.get('files', []):
+                    if file.get('name') and file.get('webViewLink'):
+                        url_cache.setdefault(file['name'], file['webViewLink'])
+            batch_size = 100
+            for start in range(0, len(missing), batch_size):
+                batch = drive_service.new_batch_http_request(callback=_record)
+                for name in missing[start:start + batch_size]:
+                    safe_name = name.replace("'", "\\'")
+                    batch.add(drive_service.files().list(
+                        q=f"name = '{safe_name}' and trashed = false and sharedWithMe = true",
+                        spaces='drive',
+                        fields='files(id, name, webViewLink)',
+                        pageSize=1))
+                batch.execute()
+            if verbose:
+                print_progress(
+                    f"Shared-with-me batch pass resolved {len(url_cache)}/{len(filenames)} filenames",
+                    verbose)
+    except Exception as e:
+        print_progress(f"Error batch-resolving Google Drive URLs: {e}", verbose, file=sys.stderr)
+    return url_cache
+
+# Trim everything before the "Calibre Library" folder in one precompiled scan
+# instead of lowercasing and .find()-ing per format
+_CALIBRE_LIBRARY_RE = re.compile(r'calibre library.*', re.IGNORECASE)
+
+def _make_drive_resolver(google_creds, verbose=False, drive_url_cache=None):
+    """
+    Pick the filename -> Drive URL strategy once and return it as a callable,
+    so the per-format loop in get_attachment_paths carries no branching.
+    Local-only runs get a constant-None resolver and never touch the Drive
+    code paths at all.
+    """
+    if drive_url_cache is not None:
+        # URLs were bulk-resolved up front; no per-file network traffic
+        return drive_url_cache.get
+    if not google_creds:
+        return lambda filename: None
+
+    def resolve(filename):
+        if verbose:
+            print_progress(f"Searching for {filename} in Google Drive (own and shared folders)", verbose)
+        try:
+            # Search in both own and shared folders
+            drive_url = get_drive_url_by_filename(
+                google_creds,
+                filename,
+                exact_match=True,
+                folder_name=None,
+                return_all=False,
+                verbose=verbose
+            )
+            if not drive_url:
+                # Try searching in shared files explicitly if not found
+                drive_service = get_drive_service(google_creds)
+                safe_filename = filename.replace("'", "\\'")
+                query = f"name = '{safe_filename}' and trashed = false and sharedWithMe = true"
+                results = search_file_in_drive(drive_service, query, max_results=1, include_shared=True)
+                if results:
+                    drive_url = results[0].get('webViewLink')
+            if drive_url and verbose:
+                print_progress(f"Found Google Drive URL for {filename}", verbose)
+            return drive_url
+        except Exception as e:
+            if verbose:
+                print_progress(f"Error searching Google Drive for {filename}: {e}", verbose, file=sys.stderr)
+            return None
+
+    return resolve
+
+def get_attachment_paths(book, library_path, google_creds=None, verbose=False, drive_url_cache=None):
+    attachment_info = []
+    resolve = _make_drive_resolver(google_creds, verbose, drive_url_cache)
+    # Resolve the book folder once per book, not once per format
+    book_folder = (pathlib.Path(library_path) / book['path']).resolve().as_posix()
+    for ext, name in zip(book['format_exts'], book['format_names']):
+        filename = _attachment_filename(ext, name)
+        # _attachment_filename already guarantees the extension suffix
+        local_path_str = f"{book_folder}/{filename}"
+        match = _CALIBRE_LIBRARY_RE.search(local_path_str)
+        if match:
+            local_path_str = match.group(0)
+        attachment_info.append({'local_path': local_path_str,
+                                'drive_url': resolve(filename)})
     return attachment_info
 
-def format_book_text(book, library_path, google_creds=None, verbose=False):
+# Single-pass HTML escaping: str.translate does one scan in C instead of the
+# five sequential .replace() passes html.escape makes per field.
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;',
+                              '"': '&quot;', "'": '&#x27;'})
+
+def _escape_html(value):
+    return (value or '').translate(_HTML_ESCAPE)
+
+# Formatters take the attachments pre-resolved so a caller producing several
+# output flavors (or emailing plus listing) pays for get_attachment_paths once
+# per book, not once per output.
+def format_book_text(book, attachments):
     output = []
     output.append(f"Title: {book['title']}")
     if book['authors']:
@@ -409,7 +795,6 @@ def format_book_text(book, library_path, google_creds=None, verbose=False):
         output.append(f"ASIN: {book['asin']}")
     if book.get('doi'):
         output.append(f"DOI: {book['doi']}")
-    attachments = get_attachment_paths(book, library_path, google_creds, verbose)
     if attachments:
         output.append("Attachments:")
         for attachment in attachments:
@@ -421,41 +806,43 @@ def format_book_text(book, library_path, google_creds=None, verbose=False):
                 output.append(f"  - {local_path}")
     return "\n".join(output)
 
-def format_book_html(book, library_path, google_creds=None, verbose=False):
+def format_book_html(book, attachments):
     html_parts = [f"<div class='item'>"
-                 f"<h2>{html.escape(book['title'] or 'Unknown')}</h2>"]
+                 f"<h2>{_escape_html(book['title'] or 'Unknown')}</h2>"]
     if book['authors']:
-        html_parts.append(f"<p><strong>Authors:</strong> {html.escape('; '.join(book['authors']))}</p>")
+        html_parts.append(f"<p><strong>Authors:</strong> {_escape_html('; '.join(book['authors']))}</p>")
     if book['series']:
-        html_parts.append(f"<p><strong>Series:</strong> {html.escape(book['series'])} ({book['series_index']})</p>")
+        html_parts.append(f"<p><strong>Series:</strong> {_escape_html(book['series'])} ({book['series_index']})</p>")
     if book['publisher']:
-        html_parts.append(f"<p><strong>Publisher:</strong> {html.escape(book['publisher'])}</p>")
+        html_parts.append(f"<p><strong>Publisher:</strong> {_escape_html(book['publisher'])}</p>")
     if book['pubdate']:
-        html_parts.append(f"<p><strong>Date:</strong> {html.escape(str(book['pubdate']))}</p>")
+        html_parts.append(f"<p><strong>Date:</strong> {_escape_html(str(book['pubdate']))}</p>")
     if book['isbn']:
-        html_parts.append(f"<p><strong>ISBN:</strong> {html.escape(book['isbn'])}</p>")
+        html_parts.append(f"<p><strong>ISBN:</strong> {_escape_html(book['isbn'])}</p>")
     if book.get('asin'):
-        html_parts.append(f"<p><strong>ASIN:</strong> {html.escape(book['asin'])}</p>")
+        html_parts.append(f"<p><strong>ASIN:</strong> {_escape_html(book['asin'])}</p>")
     if book.get('doi'):
-        html_parts.append(f"<p><strong>DOI:</strong> {html.escape(book['doi'])}</p>")
-    attachments = get_attachment_paths(book, library_path, google_creds, verbose)
+        html_parts.append(f"<p><strong>DOI:</strong> {_escape_html(book['doi'])}</p>")
     if attachments:
         html_parts.append("<p><strong>Attachments:</strong></p>")
         html_parts.append("<ul>")
         for attachment in attachments:
-            local_path = html.escape(attachment.get('local_path', 'Unknown'))
+            local_path = _escape_html(attachment.get('local_path', 'Unknown'))
             drive_url = attachment.get('drive_url')
             if drive_url:
-                html_parts.append(f"<li>{local_path} - <a href='{html.escape(drive_url)}' target='_blank'>View on Google Drive</a></li>")
+                html_parts.append(f"<li>{local_path} - <a href='{_escape_html(drive_url)}' target='_blank'>View on Google Drive</a></li>")
             else:
                 html_parts.append(f"<li>{local_path}</li>")
         html_parts.append("</ul>")
     html_parts.append("</div>")
     return "\n".join(html_parts)
 
-def generate_text_output(books, library_path, google_creds=None, verbose=False, categories=None):
+def generate_text_output(books, library_path, google_creds=None, verbose=False, categories=None, out=None):
     if verbose:
         print_progress("Starting text output generation", verbose)
+    # The URL precache and the ordered fan-out below need the whole set
+    if not isinstance(books, list):
+        books = list(books)
     current_date = datetime.now().strftime("%Y-%m-%d")
     if categories:
         tag_title = "Calibre Library: " + ", ".join(categories)
@@ -467,10 +854,16 @@ def generate_text_output(books, library_path, google_creds=None, verbose=False,
         "=" * len(title),
         ""
     ]
+    # Resolve all Drive URLs in one batched pass before the formatting fan-out
+    drive_url_cache = None
+    if google_creds:
+        drive_url_cache = precache_drive_urls(
+            google_creds, collect_attachment_filenames(books), verbose)
     def format_single_book(idx, book):
         try:
             item_header = f"Book #{idx+1}"
-            item_content = format_book_text(book, library_path, google_creds, verbose)
+            attachments = get_attachment_paths(book, library_path, google_creds, verbose, drive_url_cache)
+            item_content = format_book_text(book, attachments)
             return f"{item_header}\n{item_content}\n---"
         except Exception as e:
             error_msg = f"Error formatting book {idx+1}: {e}"
@@ -495,36 +888,63 @@ def generate_text_output(books, library_path, google_creds=None, verbose=False,
                 print_progress(error_msg, verbose, file=sys.stderr)
                 formatted_books.append((idx, f"{error_msg}\n---"))
     formatted_books.sort(key=lambda x: x[0])
-    ordered_books = [text for _, text in formatted_books]
+    # Stream into the given handle (or a StringIO) instead of joining one
+    # giant string; with a file handle the document is never held in memory
+    buffer = out if out is not None else io.StringIO()
+    write = buffer.write
+    write("\n".join(header))
+    for _, text in formatted_books:
+        write("\n")
+        write(text)
     if verbose:
         print_progress("Text output generation complete", verbose)
-    return "\n".join(header + ordered_books)
+    if out is None:
+        return buffer.getvalue()
+    return None
 
-def generate_html_header(title, notice=None):
-    default_notice = "This document was automatically generated from a Calibre library. Items are listed for personal reference only. All references, articles, and other content remain the property of their respective copyright holders. This document is not for redistribution. Last updated on " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "."
-    notice_text = notice if notice is not None else default_notice
-    return [
+# Static CSS/JS shared by the inline output and --external-assets mode. With
+# external assets the browser caches (and skips re-parsing) them across pages.
+_PAGE_CSS = "\n".join([
+    "body { font-family: Arial, sans-serif; margin: 40px; }",
+    ".item { margin-bottom: 30px; border-bottom: 1px solid #ccc; padding-bottom: 20px; }",
+    ".item-number { font-weight: bold; color: #7f8c8d; margin-bottom: 5px; }",
+    "h1 { color: #2c3e50; }",
+    "h2 { color: #3498db; }",
+    ".notice { font-style: italic; background-color: #f8f9fa; padding: 10px; border-left: 3px solid #3498db; margin-bottom: 20px; }",
+    ".coffee-button { position: absolute; top: 20px; right: 20px; }",
+    ".coffee-button img { height: 40px; border: none; }",
+    ".search-container { margin-bottom: 20px; padding: 15px; background-color: #f8f9fa; border-radius: 5px; }",
+    "#searchInput { width: 300px; padding: 8px; font-size: 16px; border: 1px solid #ccc; border-radius: 4px; }",
+    "#searchBtn { padding: 8px 15px; background-color: #3498db; color: white; border: none; border-radius: 4px; cursor: pointer; margin-left: 10px; }",
+    "#searchBtn:hover { background-color: #2980b9; }",
+    "#searchCount { margin-left: 15px; font-style: italic; }",
+    ".highlight { background-color: yellow; font-weight: bold; }",
+    ".hidden { display: none; }",
+])
+
+def write_static_assets(output_dir, verbose=False):
+    """Write style.css and search.js next to the HTML output (once per run)."""
+    css_path = os.path.join(output_dir, "style.css")
+    js_path = os.path.join(output_dir, "search.js")
+    with open(css_path, 'w', encoding='utf-8') as f:
+        f.write(_PAGE_CSS)
+        f.write("\n")
+    with open(js_path, 'w', encoding='utf-8') as f:
+        f.write(_SEARCH_JS)
+        f.write("\n")
+    if verbose:
+        print_progress(f"Static assets written to {css_path} and {js_path}", verbose)
+
+# The header is identical across outputs except for title/notice, so both
+# variants (inline CSS and <link>) are joined once at import and .format()ed
+# per call. Literal braces in the CSS are doubled so .format leaves them alone.
+def _build_header_template(style_lines):
+    return "\n".join([
         "<!DOCTYPE html>",
         "<html>",
         "<head>",
-        f"<title>{title}</title>",
-        "<style>",
-        "body { font-family: Arial, sans-serif; margin: 40px; }",
-        ".item { margin-bottom: 30px; border-bottom: 1px solid #ccc; padding-bottom: 20px; }",
-        ".item-number { font-weight: bold; color: #7f8c8d; margin-bottom: 5px; }",
-        "h1 { color: #2c3e50; }",
-        "h2 { color: #3498db; }",
-        ".notice { font-style: italic; background-color: #f8f9fa; padding: 10px; border-left: 3px solid #3498db; margin-bottom: 20px; }",
-        ".coffee-button { position: absolute; top: 20px; right: 20px; }",
-        ".coffee-button img { height: 40px; border: none; }",
-        ".search-container { margin-bottom: 20px; padding: 15px; background-color: #f8f9fa; border-radius: 5px; }",
-        "#searchInput { width: 300px; padding: 8px; font-size: 16px; border: 1px solid #ccc; border-radius: 4px; }",
-        "#searchBtn { padding: 8px 15px; background-color: #3498db; color: white; border: none; border-radius: 4px; cursor: pointer; margin-left: 10px; }",
-        "#searchBtn:hover { background-color: #2980b9; }",
-        "#searchCount { margin-left: 15px; font-style: italic; }",
-        ".highlight { background-color: yellow; font-weight: bold; }",
-        ".hidden { display: none; }",
-        "</style>",
+        "<title>{title}</title>",
+        *style_lines,
         "</head>",
         "<body>",
         "<div class='coffee-button'>",
@@ -532,43 +952,93 @@ def generate_html_header(title, notice=None):
         "<img src='https://cdn.buymeacoffee.com/buttons/v2/default-yellow.png' alt='Buy Me A Coffee'>",
         "</a>",
         "</div>",
-        f"<h1>{title}</h1>",
-        f"<div class='notice'>{notice_text}</div>"
-    ]
+        "<h1>{title}</h1>",
+        "<div class='notice'>{notice}</div>"
+    ])
+
+_HEADER_TEMPLATE_INLINE = _build_header_template(
+    ["<style>", _PAGE_CSS.replace('{', '{{').replace('}', '}}'), "</style>"])
+_HEADER_TEMPLATE_EXTERNAL = _build_header_template(
+    ["<link rel='stylesheet' href='style.css'>"])
+
+_SEARCH_CONTAINER = "\n".join([
+    "<div class='search-container'>",
+    "<input type='text' id='searchInput' placeholder='Search within this page...' />",
+    "<button id='searchBtn'>Search</button>",
+    "<span id='searchCount'></span>",
+    "</div>"
+])
+
+def generate_html_header(title, notice=None, external_assets=False):
+    default_notice = "This document was automatically generated from a Calibre library. Items are listed for personal reference only. All references, articles, and other content remain the property of their respective copyright holders. This document is not for redistribution. Last updated on " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "."
+    notice_text = notice if notice is not None else default_notice
+    template = _HEADER_TEMPLATE_EXTERNAL if external_assets else _HEADER_TEMPLATE_INLINE
+    return template.format(title=title, notice=notice_text)
 
 def generate_search_container():
-    return [
-        "<div class='search-container'>",
-        "<input type='text' id='searchInput' placeholder='Search within this page...' />",
-        "<button id='searchBtn'>Search</button>",
-        "<span id='searchCount'></span>",
-        "</div>"
-    ]
+    return _SEARCH_CONTAINER
 
-def format_single_book(idx, book, library_path, google_creds, verbose):
+def format_single_book(idx, book, library_path, google_creds, verbose, drive_url_cache=None):
     try:
         item_number = f"<div class='item-number'>Book #{idx+1}</div>"
-        item_content = format_book_html(book, library_path, google_creds, verbose)
+        attachments = get_attachment_paths(book, library_path, google_creds, verbose, drive_url_cache)
+        item_content = format_book_html(book, attachments)
         return item_number + "\n" + item_content
     except Exception as e:
         error_msg = f"Error formatting book {idx+1}: {e}"
         print_progress(error_msg, verbose, file=sys.stderr)
         return f"<div class='item-error'>{error_msg}</div>"
 
+def _format_single_book_job(args):
+    # Picklable worker for ProcessPoolExecutor: no credentials or service
+    # objects, just the book, paths and the precomputed URL dict.
+    idx, book, library_path, drive_url_cache = args
+    return format_single_book(idx, book, library_path, None, False, drive_url_cache)
+
 def generate_books_html(books, library_path, google_creds, verbose):
-    if verbose:
-        print_progress(f"Preparing to format {len(books)} books simultaneously", verbose)
+    # Resolve all Drive URLs in one batched pass before the formatting fan-out.
+    # That pass (and the process pool below) needs the full book set, so only
+    # a creds-free thread-pool run can consume a streaming generator directly.
+    drive_url_cache = None
+    if google_creds:
+        if not isinstance(books, list):
+            books = list(books)
+        if verbose:
+            print_progress(f"Preparing to format {len(books)} books simultaneously", verbose)
+        drive_url_cache = precache_drive_urls(
+            google_creds, collect_attachment_filenames(books), verbose)
+    # With URLs precached (or Drive disabled) the formatting is pure-Python
+    # CPU work, so threads just serialize on the GIL. Spread it across
+    # processes instead; fall back to the thread pool if that fails (e.g. an
+    # environment where the workers can't be spawned).
+    if drive_url_cache is not None or not google_creds:
+        if not isinstance(books, list):
+            books = list(books)
+        if len(books) > 1:
+            jobs = [(i, book, library_path, drive_url_cache) for i, book in enumerate(books)]
+            chunksize = max(1, len(books) // ((os.cpu_count() or 1) * 4))
+            try:
+                with concurrent.futures.ProcessPoolExecutor() as executor:
+                    formatted = list(executor.map(_format_single_book_job, jobs, chunksize=chunksize))
+                if verbose:
+                    print_progress(f"Completed {len(formatted)}/{len(books)} books", verbose)
+                return formatted
+            except Exception as e:
+                print_progress(f"Process pool formatting failed, falling back to threads: {e}",
+                               verbose, file=sys.stderr)
     formatted_books = []
     with concurrent.futures.ThreadPoolExecutor() as executor:
         future_to_idx = {}
+        # Submitting while iterating lets formatting overlap a streaming scan
         for i, book in enumerate(books):
-            future = executor.submit(format_single_book, i, book, library_path, google_creds, verbose)
+            future = executor.submit(format_single_book, i, book, library_path, google_creds, verbose, drive_url_cache)
             future_to_idx[future] = i
+        total = len(future_to_idx)
         completed = 0
         for future in concurrent.futures.as_completed(future_to_idx):
             completed += 1
-            if verbose and (completed % 10 == 0 or completed == len(books)):
-                print_progress(f"Completed {completed}/{len(books)} books", verbose)
+            if verbose and (completed % 10 == 0 or completed == total):
+                print_progress(f"Completed {completed}/{total} books", verbose)
             idx = future_to_idx[future]
             try:
                 formatted_books.append((idx, future.result()))
@@ -579,75 +1049,90 @@ def generate_books_html(books, library_path, google_creds, verbose):
     formatted_books.sort(key=lambda x: x[0])
     return [html_content for _, html_content in formatted_books]
 
-def generate_search_script():
-    return [
-        "<script>",
+# Tokenization used to build the client-side inverted index; mirrored by the
+# Unicode [\p{L}\p{N}_]{3,} matcher in the generated search script, so
+# accented titles tokenize the same way on both sides.
+_TAG_RE = re.compile(r'<[^>]+>')
+_TOKEN_RE = re.compile(r'\w{3,}')
+
+def build_search_index(fragments):
+    """Map each search token to the list of item indexes containing it."""
+    token_index = {}
+    for idx, fragment in enumerate(fragments):
+        text = _TAG_RE.sub(' ', fragment).lower()
+        for token in sorted(set(_TOKEN_RE.findall(text))):
+            token_index.setdefault(token, []).append(idx)
+    return token_index
+
+# Static search logic; only the SEARCH_INDEX constant varies per output, so
+# this body can live in an external search.js under --external-assets.
+_SEARCH_JS = "\n".join([
         "document.addEventListener('DOMContentLoaded', function() {",
         "  const searchInput = document.getElementById('searchInput');",
         "  const searchBtn = document.getElementById('searchBtn');",
         "  const searchCount = document.getElementById('searchCount');",
         "  const items = document.querySelectorAll('.item');",
+        "  const originalHtml = Array.from(items, () => null);",
+        "  const itemText = Array.from(items, item => item.textContent.toLowerCase());",
         "",
+        "  function clearHighlights() {",
+        "    items.forEach((item, i) => {",
+        "      if (originalHtml[i] !== null) {",
+        "        item.innerHTML = originalHtml[i];",
+        "        originalHtml[i] = null;",
+        "      }",
+        "      item.classList.remove('hidden');",
+        "    });",
+        "  }",
+        "  function matchingIndexes(searchTerm) {",
+        "    const tokens = searchTerm.match(/[\\p{L}\\p{N}_]{3,}/gu) || [];",
+        "    if (tokens.length === 0) {",
+        "      // Short queries can't use the token index; fall back to the",
+        "      // prebuilt lowercase text cache",
+        "      const matches = new Set();",
+        "      itemText.forEach((text, i) => { if (text.includes(searchTerm)) matches.add(i); });",
+        "      return matches;",
+        "    }",
+        "    let matches = null;",
+        "    for (const token of tokens) {",
+        "      if (!(token in SEARCH_INDEX)) {",
+        "        // Token missing from the index: either no item contains it",
+        "        // or the tokenizers disagree on this word; the substring",
+        "        // scan answers both cases correctly",
+        "        const matches = new Set();",
+        "        itemText.forEach((text, i) => { if (text.includes(searchTerm)) matches.add(i); });",
+        "        return matches;",
+        "      }",
+        "      const postings = new Set(SEARCH_INDEX[token]);",
+        "      if (matches === null) {",
+        "        matches = postings;",
+        "      } else {",
+        "        matches = new Set([...matches].filter(i => postings.has(i)));",
+        "      }",
+        "      if (matches.size === 0) break;",
+        "    }",
+        "    return matches || new Set();",
+        "  }",
         "  function performSearch() {",
         "    const searchTerm = searchInput.value.toLowerCase().trim();",
+        "    clearHighlights();",
         "    if (searchTerm === '') {",
-        "      items.forEach(item => {",
-        "        item.classList.remove('hidden');",
-        "        const highlighted = item.querySelectorAll('.highlight');",
-        "        highlighted.forEach(el => {",
-        "          const parent = el.parentNode;",
-        "          parent.replaceChild(document.createTextNode(el.textContent), el);",
-        "          parent.normalize();",
-        "        });",
-        "      });",
         "      searchCount.textContent = '';",
         "      return;",
         "    }",
-        "    let matchCount = 0;",
-        "    items.forEach(item => {",
-        "      const text = item.textContent.toLowerCase();",
-        "      const hasMatch = text.includes(searchTerm);",
-        "      if (hasMatch) {",
+        "    const matches = matchingIndexes(searchTerm);",
+        "    const escaped = searchTerm.replace(/[.*+?^${}()|[\\]\\\\]/g, '\\\\$&');",
+        "    const highlightRe = new RegExp(escaped + '(?![^<]*>)', 'gi');",
+        "    items.forEach((item, i) => {",
+        "      if (matches.has(i)) {",
         "        item.classList.remove('hidden');",
-        "        matchCount++;",
-        "        highlightText(item, searchTerm);",
+        "        originalHtml[i] = item.innerHTML;",
+        "        item.innerHTML = item.innerHTML.replace(highlightRe, m => `<span class=\"highlight\">${m}</span>`);",
         "      } else {",
         "        item.classList.add('hidden');",
         "      }",
         "    });",
-        "    searchCount.textContent = `Found ${matchCount} matching items`;",
-        "  }",
-        "  function highlightText(element, searchTerm) {",
-        "    const highlighted = element.querySelectorAll('.highlight');",
-        "    highlighted.forEach(el => {",
-        "      const parent = el.parentNode;",
-        "      parent.replaceChild(document.createTextNode(el.textContent), el);",
-        "      parent.normalize();",
-        "    });",
-        "    function processNode(node) {",
-        "      if (node.nodeType === 3) {",
-        "        const text = node.nodeValue.toLowerCase();",
-        "        const index = text.indexOf(searchTerm.toLowerCase());",
-        "        if (index >= 0) {",
-        "          const before = node.nodeValue.substring(0, index);",
-        "          const match = node.nodeValue.substring(index, index + searchTerm.length);",
-        "          const after = node.nodeValue.substring(index + searchTerm.length);",
-        "          const beforeNode = document.createTextNode(before);",
-        "          const matchNode = document.createElement('span');",
-        "          matchNode.classList.add('highlight');",
-        "          matchNode.textContent = match;",
-        "          const afterNode = document.createTextNode(after);",
-        "          const parent = node.parentNode;",
-        "          parent.replaceChild(afterNode, node);",
-        "          parent.insertBefore(matchNode, afterNode);",
-        "          parent.insertBefore(beforeNode, matchNode);",
-        "          processNode(afterNode);",
-        "        }",
-        "      } else if (node.nodeType === 1 && node.childNodes && !/(script|style)/i.test(node.tagName)) {",
-        "        Array.from(node.childNodes).forEach(child => processNode(child));",
-        "      }",
-        "    }",
-        "    processNode(element);",
+        "    searchCount.textContent = `Found ${matches.size} matching items`;",
         "  }",
         "  searchBtn.addEventListener('click', performSearch);",
         "  searchInput.addEventListener('keyup', function(event) {",
@@ -656,12 +1141,24 @@ def generate_search_script():
         "    }",
         "  });",
         "});",
-        "</script>",
-        "</body>",
-        "</html>"
-    ]
+])
+
+# Everything after the SEARCH_INDEX constant is static, so both tails are
+# joined once at import
+_SCRIPT_TAIL_INLINE = "\n".join([_SEARCH_JS, "</script>", "</body>", "</html>"])
+_SCRIPT_TAIL_EXTERNAL = "\n".join(["</script>", "<script src='search.js' defer></script>",
+                                   "</body>", "</html>"])
+
+def generate_search_script(token_index, external_assets=False):
+    # The page embeds a prebuilt token -> item-indexes map, so a search is a
+    # few dictionary lookups and posting-list intersections instead of walking
+    # every item's DOM subtree on each keystroke. The index stays inline even
+    # with external assets since it is data, not reusable code.
+    tail = _SCRIPT_TAIL_EXTERNAL if external_assets else _SCRIPT_TAIL_INLINE
+    return ("<script>\nconst SEARCH_INDEX = "
+            + json.dumps(token_index, separators=(',', ':')) + ";\n" + tail)
 
-def generate_html_output(books, library_path, google_creds=None, verbose=False, notice=None, categories=None):
+def generate_html_output(books, library_path, google_creds=None, verbose=False, notice=None, categories=None, out=None, external_assets=False):
     if verbose:
         print_progress("Starting HTML output generation", verbose)
     current_date = datetime.now().strftime("%Y-%m-%d")
@@ -670,27 +1167,39 @@ def generate_html_output(books, library_path, google_creds=None, verbose=False,
         title = f"{tag_title} - {current_date}".title()
     else:
         title = f"Calibre Library - {current_date}".title()
-    html_parts = []
-    html_parts.extend(generate_html_header(title, notice))
-    html_parts.extend(generate_search_container())
+    # Stream into the given handle (or a StringIO) instead of accumulating a
+    # list of fragments and joining: memory stays flat and the join pass goes
+    buffer = out if out is not None else io.StringIO()
+    write = buffer.write
+    write(generate_html_header(title, notice, external_assets))
+    write("\n")
+    write(generate_search_container())
+    write("\n")
     formatted_books = generate_books_html(books, library_path, google_creds, verbose)
-    html_parts.extend(formatted_books)
-    html_parts.extend(generate_search_script())
+    for book_html in formatted_books:
+        write(book_html)
+        write("\n")
+    write(generate_search_script(build_search_index(formatted_books), external_assets))
+    write("\n")
     if verbose:
         print_progress("HTML output generation complete", verbose)
-    return "\n".join(html_parts)
+    if out is None:
+        return buffer.getvalue()
+    return None
 
-def generate_pdf_output(html_content, output_file, verbose=False):
+def generate_pdf_output(html_file, output_file, verbose=False):
     if verbose:
         print_progress("Starting PDF generation...", verbose)
-        html_size_kb = len(html_content) / 1024
+        html_size_kb = os.path.getsize(html_file) / 1024
         print_progress(f"Using pdfkit to process approximately {html_size_kb:.1f} KB of HTML content", verbose)
     try:
         options = {
             'quiet': not verbose,
             'encoding': "UTF-8",
         }
-        pdfkit.from_string(html_content, output_file, options=options)
+        # from_file hands wkhtmltopdf the path directly instead of writing the
+        # whole document out of a Python string first
+        pdfkit.from_file(html_file, output_file, options=options)
         if os.path.exists(output_file):
             pdf_size_kb = os.path.getsize(output_file) / 1024
             print_progress(f"PDF successfully generated ({pdf_size_kb:.1f} KB) and saved to {output_file}", verbose)
@@ -700,132 +1209,349 @@ def generate_pdf_output(html_content, output_file, verbose=False):
         print_progress(f"Error generating PDF with pdfkit: {str(e)}", verbose, file=sys.stderr)
         sys.exit(1)
 
-def display_books(books, output_format, output_file=None, library_path=None, verbose=False, google_creds=None, notice=None, categories=None):
+def _render_pdf_shard(args):
+    # Picklable worker for the sharded PDF render pool
+    html_path, pdf_path, options = args
+    pdfkit.from_file(html_path, pdf_path, options=options)
+    return pdf_path
+
+def _generate_pdf_sharded(books, output_file, library_path, google_creds, verbose, notice, categories):
+    """
+    Render the PDF in parallel shards and merge them in order. wkhtmltopdf is
+    single-threaded, so splitting the book list across processes approximates
+    a linear speedup of the render stage for large libraries.
+    """
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    if categories:
+        tag_title = "Calibre Library: " + ", ".join(categories)
+        title = f"{tag_title} - {current_date}".title()
+    else:
+        title = f"Calibre Library - {current_date}".title()
+    formatted_books = generate_books_html(books, library_path, google_creds, verbose)
+    shard_count = min(os.cpu_count() or 1, len(formatted_books))
+    per_shard = (len(formatted_books) + shard_count - 1) // shard_count
+    options = {
+        'quiet': not verbose,
+        'encoding': "UTF-8",
+    }
+    jobs = []
+    scratch = []
+    try:
+        for start in range(0, len(formatted_books), per_shard):
+            tmp = tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False,
+                                              encoding='utf-8', buffering=1 << 20)
+            with tmp:
+                if start == 0:
+                    tmp.write(generate_html_header(title, notice))
+                else:
+                    # Continuation shards get a bare styled wrapper so the
+                    # title and notice appear once in the merged document
+                    tmp.write("<!DOCTYPE html>\n<html>\n<head>\n<style>\n")
+                    tmp.write(_PAGE_CSS)
+                    tmp.write("\n</style>\n</head>\n<body>")
+                tmp.write("\n")
+                for book_html in formatted_books[start:start + per_shard]:
+                    tmp.write(book_html)
+                    tmp.write("\n")
+                tmp.write("</body>\n</html>\n")
+            pdf_path = tmp.name[:-len('.html')] + '.pdf'
+            scratch.extend((tmp.name, pdf_path))
+            jobs.append((tmp.name, pdf_path, options))
+        if verbose:
+            print_progress(f"Rendering {len(jobs)} PDF shard(s) across {shard_count} process(es)", verbose)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=shard_count) as executor:
+            shard_pdfs = list(executor.map(_render_pdf_shard, jobs))
+        writer = pypdf.PdfWriter()
+        for shard_pdf in shard_pdfs:
+            writer.append(shard_pdf)
+        with open(output_file, 'wb') as f:
+            writer.write(f)
+    finally:
+        for path in scratch:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+def display_books(books, output_format, output_file=None, library_path=None, verbose=False, google_creds=None, notice=None, categories=None, external_assets=False):
     if not books:
         print("No books found.")
         return
     print_progress("Displaying books...", verbose)
     if output_format == 'text':
         print_progress("Generating text output...", verbose)
-        text_content = generate_text_output(books, library_path, google_creds, verbose, categories)
         if output_file:
+            # Stream into a wide-buffered handle: writes coalesce into ~1 MiB
+            # syscalls and the document never exists as one big string
             print_progress(f"Saving text output to {output_file}", verbose)
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(text_content)
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                generate_text_output(books, library_path, google_creds, verbose, categories, out=f)
             print(f"Text output saved to {output_file}")
         else:
             print_progress("Displaying text output to console", verbose)
-            print(text_content)
+            print(generate_text_output(books, library_path, google_creds, verbose, categories))
     elif output_format == 'html':
         print_progress("Generating HTML output...", verbose)
-        html_content = generate_html_output(books, library_path, google_creds, verbose, notice, categories)
         if output_file:
+            # Stream straight into the output file rather than building the
+            # whole document in memory first
             print_progress(f"Saving HTML output to {output_file}", verbose)
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            if external_assets:
+                write_static_assets(os.path.dirname(os.path.abspath(output_file)), verbose)
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                generate_html_output(books, library_path, google_creds, verbose, notice, categories, out=f, external_assets=external_assets)
             print(f"HTML output saved to {output_file}")
         else:
             print_progress("Displaying HTML output to console", verbose)
-            print(html_content)
+            print(generate_html_output(books, library_path, google_creds, verbose, notice, categories))
     elif output_format == 'pdf':
         print_progress("Generating PDF output...", verbose)
-        html_content = generate_html_output(books, library_path, google_creds, verbose, notice, categories)
         if not output_file:
             output_file = "calibre_books.pdf"
             print_progress(f"No output file specified, using default: {output_file}", verbose)
-        generate_pdf_output(html_content, output_file, verbose)
+        rendered = False
+        if pypdf is not None and len(books) > 1 and (os.cpu_count() or 1) > 1:
+            try:
+                _generate_pdf_sharded(books, output_file, library_path, google_creds, verbose, notice, categories)
+                rendered = True
+            except Exception as e:
+                print_progress(f"Sharded PDF rendering failed, falling back to a single render: {e}",
+                               verbose, file=sys.stderr)
+        if not rendered:
+            # Stream the HTML into a temp file and let wkhtmltopdf read it
+            # from disk; the document never exists as one Python string
+            tmp = tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False,
+                                              encoding='utf-8', buffering=1 << 20)
+            try:
+                with tmp:
+                    generate_html_output(books, library_path, google_creds, verbose, notice, categories, out=tmp)
+                generate_pdf_output(tmp.name, output_file, verbose)
+            finally:
+                try:
+                    os.unlink(tmp.name)
+                except OSError:
+                    pass
         print(f"PDF output saved to {output_file}")
     print_progress("Book display complete", verbose)
 
-def select_random_book(conn, sent_books_file="sent_books.txt"):
-    books = list_calibre_books(conn)
-    if not books:
-        return None
-    sent_ids = set()
-    if os.path.exists(sent_books_file):
+def _open_sent_books_db(sent_books_file):
+    """
+    Open (creating if needed) the sidecar SQLite DB that tracks sent book
+    ids. Indexed inserts and lookups replace re-parsing a growing text file
+    on every selection. A pre-existing sent_books.txt is imported once, the
+    first time the table is found empty, so older runs keep counting.
+    """
+    db_path = os.path.splitext(sent_books_file)[0] + ".db"
+    sent_db = sqlite3.connect(db_path)
+    # WAL lets parallel senders read while another is recording its id
+    _tune_connection(sent_db)
+    sent_db.execute("CREATE TABLE IF NOT EXISTS sent_books(id INTEGER PRIMARY KEY)")
+    empty = sent_db.execute("SELECT 1 FROM sent_books LIMIT 1").fetchone() is None
+    if empty and os.path.exists(sent_books_file):
+        legacy_ids = []
         with open(sent_books_file, "r", encoding="utf-8") as f:
             for line in f:
                 line = line.strip()
                 if line:
-                    sent_ids.add(line)
-    unsent_books = [book for book in books if str(book['id']) not in sent_ids]
-    if not unsent_books:
-        return None
-    selected_book = random.choice(unsent_books)
-    # Record the sent book
-    with open(sent_books_file, "a", encoding="utf-8") as f:
-        f.write(f"{selected_book['id']}\n")
-    return selected_book
+                    try:
+                        legacy_ids.append((int(line),))
+                    except ValueError:
+                        pass
+        if legacy_ids:
+            sent_db.executemany("INSERT OR IGNORE INTO sent_books(id) VALUES (?)", legacy_ids)
+    sent_db.commit()
+    return sent_db
 
-def send_book_email(book, library_path, recipient_email, gmail_username, gmail_app_password, verbose=False, google_creds=None):
+def select_random_book(conn, sent_books_file="sent_books.txt"):
+    sent_db = _open_sent_books_db(sent_books_file)
+    try:
+        sent_ids = {row[0] for row in sent_db.execute("SELECT id FROM sent_books")}
+        # Pick among bare ids and fetch metadata only for the winner, instead
+        # of materializing every book dict just to discard all but one
+        cursor = conn.cursor()
+        if sent_ids:
+            placeholders = ','.join(['?'] * len(sent_ids))
+            cursor.execute(f"SELECT id FROM books WHERE id NOT IN ({placeholders})",
+                           tuple(sent_ids))
+        else:
+            cursor.execute("SELECT id FROM books")
+        unsent_ids = [row[0] for row in cursor]
+        if not unsent_ids:
+            return None
+        selected_id = random.choice(unsent_ids)
+        selected_book = next(iter(list_calibre_books(conn, book_ids=[selected_id])), None)
+        if selected_book is None:
+            return None
+        # Record the sent book; INSERT OR IGNORE is atomic under SQLite's
+        # locking, so parallel senders can't clobber each other
+        sent_db.execute("INSERT OR IGNORE INTO sent_books(id) VALUES (?)", (selected_id,))
+        sent_db.commit()
+        return selected_book
+    finally:
+        sent_db.close()
+
+def _connect_gmail_smtp(gmail_username, gmail_app_password):
+    """Open and authenticate one Gmail SMTP session (reused across sends)."""
+    smtp = smtplib.SMTP_SSL('smtp.gmail.com', 465)
+    try:
+        # Small command writes shouldn't sit in Nagle's buffer waiting for ACKs
+        smtp.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        pass
+    smtp.login(gmail_username, gmail_app_password)
+    return smtp
+
+def _send_pipelined(smtp, sender, recipients, data):
     """
-    Send an email with book info using Gmail SMTP and app password.
-    If a Google Drive file is available and <= 20MB, download and attach it.
+    Send one message, batching MAIL FROM and all RCPT TO commands into a
+    single write when the server advertises RFC 2920 PIPELINING. That turns
+    the 2+N command round-trips of smtp.sendmail into two, which is what
+    dominates per-message cost on a reused connection.
     """
-    sender = gmail_username
-    subject = f"[Calibre] Random Book: {book['title']}"
+    smtp.ehlo_or_helo_if_needed()
+    if 'pipelining' not in smtp.esmtp_features:
+        smtp.sendmail(sender, recipients, data)
+        return
+    smtp.putcmd("mail", f"FROM:<{sender}>")
+    for recipient in recipients:
+        smtp.putcmd("rcpt", f"TO:<{recipient}>")
+    # Only now drain the queued replies, in command order
+    code, resp = smtp.getreply()
+    if code != 250:
+        for _ in recipients:
+            smtp.getreply()
+        raise smtplib.SMTPSenderRefused(code, resp, sender)
+    refused = {}
+    for recipient in recipients:
+        code, resp = smtp.getreply()
+        if code not in (250, 251):
+            refused[recipient] = (code, resp)
+    if len(refused) == len(recipients):
+        raise smtplib.SMTPRecipientsRefused(refused)
+    # data() only raises on a refused DATA command; the verdict on the
+    # payload itself (e.g. Gmail rejecting an oversized message after
+    # base64 expansion) comes back in the post-payload reply
+    code, resp = smtp.data(data)
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+
+# Matches both Drive URL shapes (/d/<id> and ?id=<id>) in one compiled scan
+_DRIVE_ID_RE = re.compile(r'(?:/d/|[?&]id=)([a-zA-Z0-9_-]+)')
+
+# file_id -> {'name': ..., 'size': ...}: the same book fans out to many
+# recipients, so the metadata round-trip is only worth paying once
+_drive_file_metadata_cache = {}
+
+def _prefetch_drive_metadata(drive_service, file_ids, verbose=False):
+    """Batch files().get for every uncached id into a single HTTP request."""
+    missing = [fid for fid in file_ids if fid not in _drive_file_metadata_cache]
+    if not missing:
+        return
+
+    def _record(request_id, response, exception):
+        if exception is None and response and 'id' in response:
+            _drive_file_metadata_cache[response['id']] = response
 
-    # Get attachments and drive URLs
+    batch = drive_service.new_batch_http_request(callback=_record)
+    for file_id in missing:
+        batch.add(drive_service.files().get(fileId=file_id, fields='id,name,size'))
+    try:
+        batch.execute()
+    except Exception as e:
+        if verbose:
+            print_progress(f"Batched Drive metadata lookup failed: {e}", verbose, file=sys.stderr)
+
+def _prepare_book_attachment(book, library_path, google_creds=None, verbose=False):
+    """
+    Resolve a book's attachments and download the first Drive file <= 20MB.
+    Returns (attachments, payload) where payload is (filename, bytes) or None.
+    Callers fanning one book out to several recipients compute this once and
+    pass it to send_book_email so the download isn't repeated per recipient.
+    """
     attachments = get_attachment_paths(book, library_path, google_creds, verbose)
-    drive_links = []
-    attached = False
+    if not google_creds:
+        return attachments, None
+    drive_service = get_drive_service(google_creds)
+    # Resolve every candidate's file id up front and fetch their metadata in
+    # one batched request instead of a files().get round-trip per attachment
+    candidate_ids = []
+    for attachment in attachments:
+        drive_url = attachment.get('drive_url')
+        if not drive_url:
+            continue
+        match = _DRIVE_ID_RE.search(drive_url)
+        if match:
+            candidate_ids.append(match.group(1))
+        elif verbose:
+            print_progress(f"Could not extract file ID from Google Drive URL: {drive_url}", verbose, file=sys.stderr)
+    if len(candidate_ids) > 1:
+        _prefetch_drive_metadata(drive_service, candidate_ids, verbose)
+    # Bind the attribute chains once outside the loop; each dotted lookup is
+    # a dict probe per iteration otherwise
+    files_resource = drive_service.files()
+    files_get = files_resource.get
+    files_get_media = files_resource.get_media
+    cached_metadata = _drive_file_metadata_cache.get
+    for file_id in candidate_ids:
+        try:
+            file_metadata = cached_metadata(file_id)
+            if file_metadata is None:
+                file_metadata = files_get(fileId=file_id, fields="name,size").execute()
+                _drive_file_metadata_cache[file_id] = file_metadata
+            fname = file_metadata['name']
+            file_size = int(file_metadata.get('size', 0))
+            if file_size > 20 * 1024 * 1024:  # 20MB
+                if verbose:
+                    print_progress(f"File '{fname}' is larger than 20MB, skipping attachment", verbose)
+                continue
+            if verbose:
+                print_progress(f"Downloading '{fname}' ({file_size/1024/1024:.2f} MB) from Google Drive for attachment", verbose)
+            request = files_get_media(fileId=file_id)
+            # Spool small files in RAM, spill big ones to disk; large chunks
+            # keep the HTTP round-trip count low
+            file_bytes = tempfile.SpooledTemporaryFile(max_size=2 * 1024 * 1024)
+            downloader = MediaIoBaseDownload(file_bytes, request,
+                                             chunksize=_DOWNLOAD_CHUNK_SIZE)
+            done = False
+            while not done:
+                status, done = downloader.next_chunk()
+                if verbose:
+                    print_progress(f"Download progress: {int(status.progress() * 100)}%", verbose)
+            file_bytes.seek(0)
+            data = file_bytes.read()
+            file_bytes.close()
+            return attachments, (fname, data)  # Only attach one file
+        except Exception as e:
+            if verbose:
+                print_progress(f"Failed to download file from Google Drive: {e}", verbose, file=sys.stderr)
+    return attachments, None
 
+def _build_book_message(book, attachments, payload, sender, verbose=False):
+    """
+    Assemble the MIME message for a book once, without a To header. The
+    recipient-independent parts (body, base64-encoded attachment) are the
+    expensive ones, so fan-out callers serialize this a single time and
+    prepend a per-recipient To line instead of rebuilding R messages.
+    """
     msg = MIMEMultipart()
-    msg['To'] = recipient_email
     msg['From'] = sender
-    msg['Subject'] = subject
+    msg['Subject'] = f"[Calibre] Random Book: {book['title']}"
 
-    # Try to attach the first available file <= 20MB from Google Drive
-    if google_creds:
-        drive_service = build('drive', 'v3', credentials=google_creds)
-        for attachment in attachments:
-            drive_url = attachment.get('drive_url')
-            if drive_url:
-                # Extract file ID from drive_url
-                match = re.search(r'/d/([a-zA-Z0-9_-]+)', drive_url)
-                if not match:
-                    # Try alternate format
-                    match = re.search(r'id=([a-zA-Z0-9_-]+)', drive_url)
-                if match:
-                    file_id = match.group(1)
-                    try:
-                        file_metadata = drive_service.files().get(fileId=file_id, fields="name,size").execute()
-                        file_size = int(file_metadata.get('size', 0))
-                        if file_size <= 20 * 1024 * 1024:  # 20MB
-                            if verbose:
-                                print_progress(f"Downloading '{file_metadata['name']}' ({file_size/1024/1024:.2f} MB) from Google Drive for attachment", verbose)
-                            request = drive_service.files().get_media(fileId=file_id)
-                            file_bytes = io.BytesIO()
-                            downloader = MediaIoBaseDownload(file_bytes, request)
-                            done = False
-                            while not done:
-                                status, done = downloader.next_chunk()
-                                if verbose:
-                                    print_progress(f"Download progress: {int(status.progress() * 100)}%", verbose)
-                            file_bytes.seek(0)
-                            part = MIMEBase('application', 'octet-stream')
-                            part.set_payload(file_bytes.read())
-                            encoders.encode_base64(part)
-                            part.add_header('Content-Disposition', f'attachment; filename="{file_metadata["name"]}"')
-                            msg.attach(part)
-                            attached = True
-                            if verbose:
-                                print_progress(f"Attached '{file_metadata['name']}' to email", verbose)
-                            break  # Only attach one file
-                        else:
-                            if verbose:
-                                print_progress(f"File '{file_metadata['name']}' is larger than 20MB, skipping attachment", verbose)
-                    except Exception as e:
-                        if verbose:
-                            print_progress(f"Failed to download or attach file from Google Drive: {e}", verbose, file=sys.stderr)
-                else:
-                    if verbose:
-                        print_progress(f"Could not extract file ID from Google Drive URL: {drive_url}", verbose, file=sys.stderr)
-            if attached:
-                break
+    attached = False
+    if payload is not None:
+        filename, data = payload
+        # MIMEApplication base64-encodes through binascii's C implementation
+        # in one shot, much faster than MIMEBase + encode_base64 on big files
+        part = MIMEApplication(data, _subtype='octet-stream')
+        part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
+        msg.attach(part)
+        attached = True
+        if verbose:
+            print_progress(f"Attached '{filename}' to email", verbose)
 
     # Compose body with drive URLs if available
-    body = format_book_text(book, library_path, google_creds, verbose)
+    body = format_book_text(book, attachments)
+    drive_links = []
     if not attached and attachments:
         # Add drive links to body if not attached
         for attachment in attachments:
@@ -838,18 +1564,133 @@ def send_book_email(book, library_path, recipient_email, gmail_username, gmail_a
     body += "\n\nThis email was sent automatically via the <a href='https://hoanganhduc.github.io/library/zotero/list-calibre-collection.py'>list-calibre-collection.py</a> script."
 
     msg.attach(MIMEText(body, "plain", "utf-8"))
+    return msg
+
+def send_book_email(book, library_path, recipient_email, gmail_username, gmail_app_password, verbose=False, google_creds=None, smtp=None, prepared=None):
+    """
+    Send an email with book info using Gmail SMTP and app password.
+    If a Google Drive file is available and <= 20MB, download and attach it.
+    An already-authenticated smtp session can be passed in to reuse one
+    connection across many sends, and a (attachments, payload) pair from
+    _prepare_book_attachment can be passed to skip re-downloading the
+    attachment for every recipient.
+    """
+    sender = gmail_username
+
+    # Get attachments and the (possibly pre-downloaded) Drive payload
+    if prepared is not None:
+        attachments, payload = prepared
+    else:
+        attachments, payload = _prepare_book_attachment(book, library_path, google_creds, verbose)
+
+    msg = _build_book_message(book, attachments, payload, sender, verbose)
+    msg['To'] = recipient_email
 
     # Send the email via Gmail SMTP
     try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
-            smtp.login(gmail_username, gmail_app_password)
-            smtp.sendmail(sender, recipient_email, msg.as_string())
+        if smtp is not None:
+            # Caller-managed session: skip the per-message TLS handshake +
+            # AUTH. as_bytes keeps the base64 payload as bytes end to end;
+            # as_string would decode and re-encode the whole attachment.
+            _send_pipelined(smtp, sender, [recipient_email],
+                            msg.as_bytes(policy=email_policy.SMTP))
+        else:
+            with smtplib.SMTP_SSL('smtp.gmail.com', 465) as one_shot:
+                one_shot.login(gmail_username, gmail_app_password)
+                one_shot.send_message(msg, from_addr=sender, to_addrs=[recipient_email])
         if verbose:
             print_progress(f"Sent '{book['title']}' to {recipient_email} via Gmail SMTP", verbose)
     except Exception as e:
         print_progress(f"Failed to send email: {e}", verbose, file=sys.stderr)
         raise
 
+# Gmail codes that signal "try again later" rather than a hard failure
+_TRANSIENT_SMTP_CODES = (421, 450, 454)
+
+def _deliver_book_emails(selected_books, recipients, library_path, gmail_username,
+                         gmail_app_password, verbose, google_creds, max_workers):
+    """
+    Send each selected book to all recipients in one SMTP transaction
+    (BCC-style RCPT fan-out), spreading books across a bounded worker pool.
+    Sending is latency-bound, so throughput scales roughly with the pool
+    size; each worker keeps its own persistent SMTP session (thread-local)
+    so the connections aren't contended. Returns the number of failed sends.
+    """
+    # Resolve attachments, download each book's Drive payload, and serialize
+    # the recipient-independent message once up front: base64 encoding and
+    # as_bytes() on a 20 MB attachment are too expensive to repeat per
+    # recipient. Workers then just prepend a To header and push bytes.
+    wire_by_id = {}
+    for book in selected_books:
+        attachments, payload = _prepare_book_attachment(book, library_path, google_creds, verbose)
+        msg = _build_book_message(book, attachments, payload, gmail_username, verbose)
+        wire_by_id[book['id']] = msg.as_bytes(policy=email_policy.SMTP)
+    local = threading.local()
+    sessions = []
+    sessions_lock = threading.Lock()
+
+    def get_session(fresh=False):
+        smtp = getattr(local, 'smtp', None)
+        if fresh and smtp is not None:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+            smtp = None
+        if smtp is None:
+            smtp = _connect_gmail_smtp(gmail_username, gmail_app_password)
+            local.smtp = smtp
+            with sessions_lock:
+                sessions.append(smtp)
+        return smtp
+
+    def deliver(book):
+        delay = 2
+        last_error = None
+        # One SMTP transaction per book: all recipients go on the RCPT list
+        # (BCC-style, so addresses stay private) and the DATA payload ships
+        # once. Header order is irrelevant, so the To line is prepended to
+        # the preserialized message.
+        wire = b"To: " + gmail_username.encode('ascii') + b"\r\n" + wire_by_id[book['id']]
+        for attempt in range(3):
+            try:
+                smtp = get_session(fresh=attempt > 0)
+                _send_pipelined(smtp, gmail_username, recipients, wire)
+                if verbose:
+                    print_progress(f"Sent '{book['title']}' to {', '.join(recipients)} via Gmail SMTP", verbose)
+                return book, None
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                # Dropped session: reconnect (fresh=True above) and retry now
+                last_error = e
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code not in _TRANSIENT_SMTP_CODES:
+                    return book, e
+                last_error = e
+                time.sleep(delay)
+                delay *= 2
+            except Exception as e:
+                return book, e
+        return book, last_error
+
+    failures = 0
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(deliver, book) for book in selected_books]
+            for future in concurrent.futures.as_completed(futures):
+                book, error = future.result()
+                if error is None:
+                    print(f"Book '{book['title']}' sent to {', '.join(recipients)}.")
+                else:
+                    failures += 1
+                    print(f"Failed to send '{book['title']}': {error}", file=sys.stderr)
+    finally:
+        for smtp in sessions:
+            try:
+                smtp.quit()
+            except Exception:
+                pass
+    return failures
+
 def parse_arguments():
     system = platform.system()
     if system == "Windows":
@@ -886,6 +1727,10 @@ def parse_arguments():
                         help='Title (or substring) of the book to send via email (can be used multiple times)')
     parser.add_argument('-u', '--gmail-username', help='Gmail address for sending email (required for --send-email)')
     parser.add_argument('-p', '--gmail-app-password', help='Gmail app password for sending email (required for --send-email)')
+    parser.add_argument('-c', '--concurrency', type=int, default=5,
+                        help='Parallel SMTP connections for --send-email (capped at 15 for Gmail, default: 5)')
+    parser.add_argument('-x', '--external-assets', action='store_true',
+                        help='Write CSS/JS to style.css and search.js next to the HTML output instead of inlining them (html output to a file only)')
     return parser.parse_args()
 
 def main():
@@ -897,17 +1742,19 @@ def main():
             print_progress("Authenticating with Google Drive using service account...", args.verbose)
             google_creds = authenticate_google_drive(args.service_account_file)
             if google_creds:
-                print_progress("Testing Google Drive access...", args.verbose)
-                success, message = test_google_drive_access(google_creds, verbose=args.verbose)
-                if success:
-                    print_progress("Google Drive access verified successfully!", args.verbose)
-                    if args.verbose:
+                # The access test costs two API round-trips and its outcome is
+                # only ever shown under --verbose, so skip it otherwise; the
+                # first real Drive call fails just as visibly if access is off
+                if args.verbose:
+                    print_progress("Testing Google Drive access...", args.verbose)
+                    success, message = test_google_drive_access(google_creds, verbose=args.verbose)
+                    if success:
+                        print_progress("Google Drive access verified successfully!", args.verbose)
                         print_progress(message, args.verbose)
-                else:
-                    print_progress("Google Drive access failed!", args.verbose, level=3, file=sys.stderr)
-                    if args.verbose:
+                    else:
+                        print_progress("Google Drive access failed!", args.verbose, level=3, file=sys.stderr)
                         print_progress(message, args.verbose, file=sys.stderr)
-                    print_progress("The script will continue, but Google Drive links won't be available.", args.verbose)
+                        print_progress("The script will continue, but Google Drive links won't be available.", args.verbose)
             else:
                 print_progress("Google Drive authentication failed. Google Drive integration will be disabled.", args.verbose, file=sys.stderr)
         else:
@@ -921,30 +1768,10 @@ def main():
             categories = [cat.strip().lower() for cat in args.tag if cat.strip()]
             print_progress(f"Filtering by tags (case-insensitive, substring match): {categories}", args.verbose)
         print_progress("Fetching books...", args.verbose)
-        books = list_calibre_books(conn)
-        # Custom tag filtering: substring match (case-insensitive)
-        if categories:
-            filtered_books = []
-            for book in books:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT t.name FROM tags t
-                    JOIN books_tags_link btl ON t.id = btl.tag
-                    WHERE btl.book = ?
-                """, (book['id'],))
-                book_tags = [row[0].lower() for row in cursor.fetchall()]
-                # Match if any category is a substring of any tag, or vice versa
-                match = False
-                for cat in categories:
-                    for tag in book_tags:
-                        if cat in tag or tag in cat:
-                            match = True
-                            break
-                    if match:
-                        break
-                if match:
-                    filtered_books.append(book)
-            books = filtered_books
+        # The substring tag match lives in list_calibre_books' WHERE
+        # clause (with a TEMP-table variant for long tag lists), so no
+        # intermediate id list is materialized or spliced into the SQL
+        books = list(list_calibre_books(conn, categories=categories))
         print_progress(f"Found {len(books)} books", args.verbose)
 
         # Email sending logic
@@ -955,13 +1782,18 @@ def main():
             if not args.gmail_username or not args.gmail_app_password:
                 print("Error: --gmail-username and --gmail-app-password are required for sending email.", file=sys.stderr)
                 sys.exit(1)
-            # Select books
+            # Select books; dedupe by id via a set so repeated queries stay
+            # O(1) per match instead of scanning the selection list
             selected_books = []
+            seen_ids = set()
             if args.book_id:
+                books_by_id = {b['id']: b for b in books}
                 for bid in args.book_id:
-                    found = next((b for b in books if b['id'] == bid), None)
+                    found = books_by_id.get(bid)
                     if found:
-                        selected_books.append(found)
+                        if bid not in seen_ids:
+                            seen_ids.add(bid)
+                            selected_books.append(found)
                     else:
                         print(f"Warning: Book with ID {bid} not found.", file=sys.stderr)
                 if not selected_books:
@@ -973,7 +1805,8 @@ def main():
                     matches = [b for b in books if title_query.lower() in (b['title'] or '').lower()]
                     if matches:
                         for m in matches:
-                            if m not in selected_books:
+                            if m['id'] not in seen_ids:
+                                seen_ids.add(m['id'])
                                 selected_books.append(m)
                     else:
                         print(f"Warning: No book found matching title '{title_query}'.", file=sys.stderr)
@@ -989,16 +1822,21 @@ def main():
             else:
                 print("Error: No book selection criteria provided for sending email.", file=sys.stderr)
                 sys.exit(1)
-            # Send to all recipients
-            for selected_book in selected_books:
-                for recipient in args.recipient:
-                    print_progress(f"Sending book '{selected_book['title']}' to {recipient}...", args.verbose)
-                    send_book_email(selected_book, args.library_path, recipient, args.gmail_username, args.gmail_app_password, verbose=args.verbose, google_creds=google_creds)
-                    print(f"Book '{selected_book['title']}' sent to {recipient}.")
+            # Fan the sends across a bounded pool of persistent SMTP sessions;
+            # the TLS handshake and AUTH round-trips are paid once per worker,
+            # not once per (book, recipient) pair.
+            max_workers = max(1, min(args.concurrency, 15))
+            print_progress(f"Sending {len(selected_books)} book(s) to {len(args.recipient)} recipient(s) with {max_workers} worker(s)...", args.verbose)
+            failures = _deliver_book_emails(
+                selected_books, args.recipient, args.library_path,
+                args.gmail_username, args.gmail_app_password,
+                args.verbose, google_creds, max_workers)
+            if failures:
+                sys.exit(1)
             return
 
         # Normal listing/output - Pass categories to display_books to include in output titles
-        display_books(books, args.output_format, args.output_file, args.library_path, args.verbose, google_creds, args.notice, categories)
+        display_books(books, args.output_format, args.output_file, args.library_path, args.verbose, google_creds, args.notice, categories, args.external_assets)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -2,21 +2,28 @@
 # -*- coding: utf-8 -*-
 # Standard library imports
 import argparse
+import asyncio
+import atexit
 import concurrent.futures
+import functools
 import json
+import time
 import os
 import html
 import io
+import itertools
 import sys
 import re
+import subprocess
 from datetime import datetime
 
 # Third-party imports
-import pdfkit
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+import google_auth_httplib2
+import httplib2
 from pyzotero import zotero
 import io
 import tempfile
@@ -24,12 +31,18 @@ from googleapiclient.http import MediaIoBaseDownload
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
+from email.mime.application import MIMEApplication
 import tempfile
 import os
 import random
 import sqlite3
+import threading
+
+# Optional: overlaps hundreds of Drive lookups on one event loop
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 # Google Drive API imports
 # Remark: Create a service account in Google Console and share Zotero folder with the service account email. If you don't share it, you won't be able to access the files.
@@ -91,6 +104,51 @@ def authenticate_google_drive(service_account_file):
     
     return creds
 
+# Drive service objects memoized per credentials object so every helper shares
+# one HTTP connection pool instead of rebuilding the client (and paying a new
+# TLS handshake) on each call
+_drive_service_cache = {}
+_drive_service_cache_lock = threading.Lock()
+
+def get_drive_service(google_creds):
+    """
+    Return a Drive API client for the given credentials, building it only once.
+
+    Args:
+        google_creds: Already authenticated Google credentials object
+
+    Returns:
+        googleapiclient.discovery.Resource: Cached Drive v3 service instance
+    """
+    with _drive_service_cache_lock:
+        service = _drive_service_cache.get(id(google_creds))
+        if service is None:
+            service = build('drive', 'v3', credentials=google_creds, cache_discovery=False)
+            _drive_service_cache[id(google_creds)] = service
+        return service
+
+# The transport inside a built service is not thread-safe: concurrent
+# execute() calls on the shared Http either serialize or corrupt. Workers
+# therefore execute requests with a per-thread AuthorizedHttp.
+_thread_http = threading.local()
+
+def _thread_local_http(google_creds):
+    """
+    Return an AuthorizedHttp owned by the calling thread.
+
+    Args:
+        google_creds: Already authenticated Google credentials object
+
+    Returns:
+        google_auth_httplib2.AuthorizedHttp: Transport safe for this thread
+    """
+    http = getattr(_thread_http, 'http', None)
+    if http is None or getattr(_thread_http, 'creds_id', None) != id(google_creds):
+        http = google_auth_httplib2.AuthorizedHttp(google_creds, http=httplib2.Http())
+        _thread_http.http = http
+        _thread_http.creds_id = id(google_creds)
+    return http
+
 def test_google_drive_access(google_creds, verbose=False):
     """
     Test access to Google Drive using Google credentials.
@@ -111,13 +169,13 @@ def test_google_drive_access(google_creds, verbose=False):
             return False, "No credentials provided. Authentication failed."
             
         # Build the Drive API client
-        drive_service = build('drive', 'v3', credentials=google_creds)
+        drive_service = get_drive_service(google_creds)
         
         # Try to get account information and file count
         about = drive_service.about().get(fields="user,storageQuota").execute()
         files = drive_service.files().list(
             pageSize=1, 
-            fields="files(id,name),nextPageToken"
+            fields="files(id),nextPageToken"
         ).execute()
         
         # Get service account email from credentials or user info
@@ -151,7 +209,7 @@ def test_google_drive_access(google_creds, verbose=False):
             print(error_message)
         return False, error_message
 
-def search_file_in_drive(drive_service, query, max_results=10, folder_name=None, include_shared=True):
+def search_file_in_drive(drive_service, query, max_results=10, folder_name=None, include_shared=True, http=None):
     """
     Search for files in Google Drive based on a query.
     
@@ -161,6 +219,7 @@ def search_file_in_drive(drive_service, query, max_results=10, folder_name=None,
         max_results (int): Maximum number of results to return
         folder_name (str, optional): Name of folder to search within (default: None, searches all of Drive)
         include_shared (bool): Whether to include files shared with the user (default: True)
+        http: Optional per-thread transport to execute requests on
         
     Returns:
         list: List of file metadata matching the query
@@ -176,8 +235,8 @@ def search_file_in_drive(drive_service, query, max_results=10, folder_name=None,
         folder_response = drive_service.files().list(
             q=folder_query,
             spaces='drive',
-            fields='files(id, name)',
-            pageSize=1).execute()
+            fields='files(id)',
+            pageSize=1).execute(http=http)
         
         folders = folder_response.get('files', [])
         if folders:
@@ -190,14 +249,18 @@ def search_file_in_drive(drive_service, query, max_results=10, folder_name=None,
         search_params = {
             'q': query,
             'spaces': 'drive',
-            'fields': 'nextPageToken, files(id, name, webViewLink)',
+            'fields': 'nextPageToken, files(id, webViewLink)',
             'pageToken': page_token,
             'pageSize': max_results
         }
         
-        response = drive_service.files().list(**search_params).execute()
+        response = drive_service.files().list(**search_params).execute(http=http)
         results.extend(response.get('files', []))
-        
+
+        # Stop before the shared-files query once we already have enough results
+        if len(results) >= max_results:
+            break
+
         # If we need to specifically search in shared files and we haven't reached max results
         if include_shared and len(results) < max_results and not folder_id:
             # Create a separate query for shared files
@@ -205,9 +268,9 @@ def search_file_in_drive(drive_service, query, max_results=10, folder_name=None,
             shared_response = drive_service.files().list(
                 q=shared_query,
                 spaces='drive',
-                fields='files(id, name, webViewLink)',
+                fields='files(id, webViewLink)',
                 pageSize=max_results - len(results)
-            ).execute()
+            ).execute(http=http)
             
             # Add any unique shared files to results
             shared_files = shared_response.get('files', [])
@@ -224,10 +287,58 @@ def search_file_in_drive(drive_service, query, max_results=10, folder_name=None,
             
     return results[:max_results]
 
+# Credentials objects are not hashable, so cached lookups key them by a
+# stable identity and fetch the object back from this registry
+_creds_registry = {}
+
+@functools.lru_cache(maxsize=4096)
+def _lookup_drive(creds_key, filename, exact_match, folder_name, return_all):
+    """
+    Perform the actual Drive filename query (cached).
+
+    Repeated lookups for the same filename (shared attachments, pipeline
+    retries) become O(1) dict hits instead of fresh network round-trips.
+
+    Args:
+        creds_key: Stable identity of the credentials in _creds_registry
+        filename (str): Name of the file to search for
+        exact_match (bool): If True, match exact filename, otherwise partial match
+        folder_name (str, optional): Name of folder to search within
+        return_all (bool): If True, return all matching URLs
+
+    Returns:
+        Union[str, tuple, None]: URL(s) of the file(s) if found, None otherwise
+    """
+    google_creds = _creds_registry[creds_key]
+    drive_service = get_drive_service(google_creds)
+
+    # Escape single quotes in filename for query
+    safe_filename = filename.replace("'", "\\'")
+
+    # Construct the search query based on the filename
+    if exact_match:
+        query = f"name = '{safe_filename}' and trashed = false"
+    else:
+        query = f"name contains '{safe_filename}' and trashed = false"
+
+    # Search for the file, possibly in a specific folder. Service accounts
+    # cannot receive shares, so the sharedWithMe pass would be wasted traffic.
+    include_shared = not hasattr(google_creds, 'service_account_email')
+    results = search_file_in_drive(drive_service, query, max_results=10 if return_all else 1,
+                                   folder_name=folder_name, include_shared=include_shared,
+                                   http=_thread_local_http(google_creds))
+
+    if not results:
+        return None
+    elif return_all:
+        return tuple(item.get('webViewLink') for item in results if 'webViewLink' in item)
+    else:
+        return results[0].get('webViewLink')
+
 def get_drive_url_by_filename(google_creds, filename, exact_match=True, folder_name=None, return_all=False, verbose=False):
     """
     Find a file in Google Drive by name and return its URL using provided Google credentials.
-    
+
     Args:
         google_creds: Already authenticated Google credentials object
         filename (str): Name of the file to search for
@@ -235,50 +346,325 @@ def get_drive_url_by_filename(google_creds, filename, exact_match=True, folder_n
         folder_name (str, optional): Name of folder to search within (None searches all of Drive)
         return_all (bool): If True, return all matching files, not just the first one
         verbose (bool): Whether to display progress messages
-        
+
     Returns:
         Union[str, List[str], None]: URL(s) of the file(s) if found, None otherwise
     """
     try:
         if verbose:
             print(f"Searching for file: {filename} in Google Drive")
-            
+
         # Check if credentials are valid
         if not google_creds:
             if verbose:
                 print("No valid Google credentials provided")
             return None
-            
-        # Build the Drive API client
-        drive_service = build('drive', 'v3', credentials=google_creds)
-        
-        # Escape single quotes in filename for query
-        safe_filename = filename.replace("'", "\\'")
-        
-        # Construct the search query based on the filename
-        if exact_match:
-            query = f"name = '{safe_filename}' and trashed = false"
-        else:
-            query = f"name contains '{safe_filename}' and trashed = false"
-            
-        # Search for the file, possibly in a specific folder
-        results = search_file_in_drive(drive_service, query, max_results=10 if return_all else 1, folder_name=folder_name)
-        
+
+        # The persistent cache covers the common exact-match lookup
+        use_cache = exact_match and not return_all and folder_name is None
+        if use_cache:
+            cached_url = _load_drive_url_cache().get(filename.strip())
+            if cached_url is not None:
+                return cached_url
+
+        # Key the cache by a stable credentials identity, not the object
+        creds_key = getattr(google_creds, 'service_account_email', None) or id(google_creds)
+        _creds_registry[creds_key] = google_creds
+
+        result = _lookup_drive(creds_key, filename.strip(), exact_match, folder_name, return_all)
+
         if verbose:
-            print(f"Found {len(results)} matching files")
-            
-        # Return based on return_all parameter
-        if not results:
+            print("Found a matching file" if result else "Found 0 matching files")
+
+        if result is None:
             return None
-        elif return_all:
-            return [item.get('webViewLink') for item in results if 'webViewLink' in item]
-        else:
-            return results[0].get('webViewLink')
-            
+        if use_cache:
+            _remember_drive_urls({filename.strip(): result})
+        return list(result) if return_all else result
+
     except Exception as e:
         print(f"Error accessing Google Drive: {str(e)}", file=sys.stderr)
         return None
 
+# The Drive batch endpoint starts returning HTTP 500s well before its
+# documented limit of 100 subrequests, so stay conservative.
+_DRIVE_BATCH_SIZE = 25
+
+# Filename -> webViewLink index built once per run by build_drive_index()
+_drive_index = None
+
+def build_drive_index(drive_service, folder_name="Zotero", mime_types=None, verbose=False):
+    """
+    Build an in-memory index of Drive filenames to webViewLink URLs.
+
+    One paginated files().list walk (1000 files per page) replaces a separate
+    Drive query per attachment, so resolving N filenames costs O(N/1000)
+    round-trips instead of O(N). The index is cached on the module for the
+    lifetime of the run.
+
+    Args:
+        drive_service: Google Drive service instance
+        folder_name (str, optional): Folder to index (falls back to the whole
+            Drive if the folder is not found)
+        mime_types (list, optional): Restrict the index to these MIME types
+        verbose (bool): Whether to display progress messages
+
+    Returns:
+        dict: Mapping of filename to webViewLink
+    """
+    global _drive_index
+    if _drive_index is not None:
+        return _drive_index
+
+    query = "trashed = false"
+    if mime_types:
+        mime_clause = " or ".join(f"mimeType = '{mime_type}'" for mime_type in mime_types)
+        query += f" and ({mime_clause})"
+
+    if folder_name:
+        folder_query = f"name = '{folder_name}' and mimeType = 'application/vnd.google-apps.folder' and trashed = false"
+        folder_response = drive_service.files().list(
+            q=folder_query,
+            spaces='drive',
+            fields='files(id)',
+            pageSize=1).execute()
+        folders = folder_response.get('files', [])
+        if folders:
+            query += f" and '{folders[0]['id']}' in parents"
+
+    index = {}
+    page_token = None
+    while True:
+        response = drive_service.files().list(
+            q=query,
+            spaces='drive',
+            fields='nextPageToken, files(name, webViewLink)',
+            pageSize=1000,
+            pageToken=page_token).execute()
+        for file in response.get('files', []):
+            index.setdefault(file['name'], file.get('webViewLink'))
+        page_token = response.get('nextPageToken', None)
+        if page_token is None:
+            break
+
+    if verbose:
+        print_progress(f"Indexed {len(index)} Drive files", verbose)
+
+    _drive_index = index
+    return index
+
+def _resolve_filenames_batch(drive_service, filenames, verbose=False):
+    """
+    Resolve filenames to Drive URLs using the JSON batch endpoint.
+
+    Packing up to 25 files().list subrequests into one HTTPS request avoids
+    a separate TLS/TCP round-trip per filename.
+
+    Args:
+        drive_service: Google Drive service instance
+        filenames (list): Filenames to search for (must be unique)
+        verbose (bool): Whether to display progress messages
+
+    Returns:
+        dict: Mapping of each filename to its Drive URL (None if not found)
+    """
+    urls = {}
+
+    def collector(request_id, response, exception):
+        if exception is not None:
+            if verbose:
+                print_progress(f"Error searching Google Drive for {request_id}: {exception}", verbose, file=sys.stderr)
+            urls[request_id] = None
+            return
+        files = response.get('files', [])
+        urls[request_id] = files[0].get('webViewLink') if files else None
+
+    for start in range(0, len(filenames), _DRIVE_BATCH_SIZE):
+        batch = drive_service.new_batch_http_request(callback=collector)
+        for filename in filenames[start:start + _DRIVE_BATCH_SIZE]:
+            safe_filename = filename.replace("'", "\\'")
+            batch.add(
+                drive_service.files().list(
+                    q=f"name = '{safe_filename}' and trashed = false",
+                    fields='files(webViewLink)',
+                    pageSize=1),
+                request_id=filename)
+        batch.execute()
+
+    return urls
+
+# Cross-run cache of resolved Drive URLs; stale entries are dropped after a day
+_DRIVE_URL_CACHE_PATH = os.path.join(os.path.expanduser("~/.cache"), "zotero-list", "drive_urls.json")
+_DRIVE_URL_CACHE_TTL = 24 * 60 * 60
+_drive_url_cache = None
+_drive_url_cache_lock = threading.Lock()
+_drive_url_cache_dirty = False
+
+def _load_drive_url_cache():
+    """Load the persistent filename -> URL cache, registering a save at exit."""
+    global _drive_url_cache
+    with _drive_url_cache_lock:
+        if _drive_url_cache is None:
+            cache = {}
+            try:
+                with open(_DRIVE_URL_CACHE_PATH, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                if time.time() - payload.get('saved', 0) < _DRIVE_URL_CACHE_TTL:
+                    cache = payload.get('urls', {})
+            except Exception:
+                pass
+            _drive_url_cache = cache
+            atexit.register(_save_drive_url_cache)
+        return _drive_url_cache
+
+def _save_drive_url_cache():
+    """Write the URL cache back to disk if this run added anything."""
+    with _drive_url_cache_lock:
+        if not _drive_url_cache_dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(_DRIVE_URL_CACHE_PATH), exist_ok=True)
+            with open(_DRIVE_URL_CACHE_PATH, 'w', encoding='utf-8') as f:
+                json.dump({'saved': time.time(), 'urls': _drive_url_cache}, f)
+        except Exception:
+            pass
+
+def _remember_drive_urls(resolved):
+    """Record freshly resolved URLs so later runs skip the Drive queries."""
+    global _drive_url_cache_dirty
+    with _drive_url_cache_lock:
+        for filename, url in resolved.items():
+            if url:
+                _drive_url_cache[filename] = url
+                _drive_url_cache_dirty = True
+
+# Above this many outstanding lookups, one event loop beats thread fan-out
+_ASYNC_LOOKUP_THRESHOLD = 50
+
+async def _drive_lookup(session, token, filename):
+    """Look up one filename against the Drive REST API on the event loop."""
+    safe_filename = filename.replace("'", "\\'")
+    params = {
+        'q': f"name = '{safe_filename}' and trashed = false",
+        'fields': 'files(webViewLink)',
+        'pageSize': 1
+    }
+    async with session.get('https://www.googleapis.com/drive/v3/files',
+                           params=params,
+                           headers={'Authorization': f'Bearer {token}'}) as response:
+        payload = await response.json()
+    files = payload.get('files', [])
+    return files[0].get('webViewLink') if files else None
+
+async def _gather_drive_lookups(token, filenames):
+    """Submit all filename lookups at once and gather their results."""
+    connector = aiohttp.TCPConnector(limit_per_host=20)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(
+            *(_drive_lookup(session, token, filename) for filename in filenames),
+            return_exceptions=True)
+    return {filename: (None if isinstance(result, Exception) else result)
+            for filename, result in zip(filenames, results)}
+
+def resolve_filenames_async(google_creds, filenames, verbose=False):
+    """
+    Resolve filenames to Drive URLs with asyncio + aiohttp.
+
+    For large lookup sets a single event loop submits every request without
+    per-request thread setup or GIL hand-offs; the connector caps concurrent
+    connections per host at 20 to respect Drive quotas.
+
+    Args:
+        google_creds: Already authenticated Google credentials object
+        filenames (list): Filenames to search for (must be unique)
+        verbose (bool): Whether to display progress messages
+
+    Returns:
+        dict: Mapping of each filename to its Drive URL (None if not found)
+    """
+    if not google_creds.valid:
+        google_creds.refresh(Request())
+
+    if verbose:
+        print_progress(f"Resolving {len(filenames)} Drive lookups asynchronously", verbose)
+
+    return asyncio.run(_gather_drive_lookups(google_creds.token, list(filenames)))
+
+def resolve_drive_urls(filenames, google_creds, verbose=False):
+    """
+    Resolve several attachment filenames to Google Drive URLs in bulk.
+
+    Most filenames are served from the run-wide index built by
+    build_drive_index(); any misses go through the Drive batch endpoint,
+    which collapses up to 25 queries into a single HTTPS request. If both
+    fail, the lookups fall back to individual queries fanned out over a
+    small thread pool, capped at 16 workers to stay well within Drive's
+    per-user request quotas.
+
+    Args:
+        filenames (list): Filenames to search for in Google Drive
+        google_creds: Already authenticated Google credentials object
+        verbose (bool): Whether to display progress messages
+
+    Returns:
+        dict: Mapping of each filename to its Drive URL (None if not found)
+    """
+    urls = {filename: None for filename in filenames}
+    if not google_creds or not urls:
+        return urls
+
+    # Filenames resolved in a previous run need no Drive traffic at all
+    cache = _load_drive_url_cache()
+    unresolved = []
+    for filename in urls:
+        cached_url = cache.get(filename)
+        if cached_url is not None:
+            urls[filename] = cached_url
+        else:
+            unresolved.append(filename)
+    if not unresolved:
+        return urls
+
+    # Serve from the filename index, then batch any remaining lookups
+    try:
+        drive_service = get_drive_service(google_creds)
+        index = build_drive_index(drive_service, verbose=verbose)
+        pending = []
+        for filename in unresolved:
+            url = index.get(filename)
+            if url is not None:
+                urls[filename] = url
+            else:
+                pending.append(filename)
+        if pending:
+            if aiohttp is not None and len(pending) > _ASYNC_LOOKUP_THRESHOLD:
+                urls.update(resolve_filenames_async(google_creds, pending, verbose))
+            else:
+                urls.update(_resolve_filenames_batch(drive_service, pending, verbose))
+        _remember_drive_urls({filename: urls[filename] for filename in unresolved})
+        return urls
+    except Exception as e:
+        if verbose:
+            print_progress(f"Bulk Drive lookup failed, falling back to individual queries: {e}", verbose, file=sys.stderr)
+
+    max_workers = min(16, len(unresolved))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_name = {
+            executor.submit(get_drive_url_by_filename, google_creds, filename,
+                            exact_match=True, verbose=verbose): filename
+            for filename in unresolved
+        }
+        for future in concurrent.futures.as_completed(future_to_name):
+            filename = future_to_name[future]
+            try:
+                urls[filename] = future.result()
+            except Exception as e:
+                if verbose:
+                    print_progress(f"Error searching Google Drive for {filename}: {e}", verbose, file=sys.stderr)
+
+    _remember_drive_urls({filename: urls[filename] for filename in unresolved})
+    return urls
+
 def print_progress(message, verbose=True, level=1, file=sys.stdout):
     """
     Print progress messages to track script execution.
@@ -298,11 +684,53 @@ def connect_to_zotero(library_id, library_type, api_key):
     """Create and return a Zotero connection."""
     return zotero.Zotero(library_id, library_type, api_key)
 
+# Candidate locations of the local Zotero database, checked in order
+LOCAL_ZOTERO_PATHS = [
+    os.path.expanduser("~/Zotero/zotero.sqlite"),
+    os.path.expanduser("~/Library/Application Support/Zotero/zotero.sqlite"),
+    os.path.expanduser("~/.zotero/zotero.sqlite"),
+    "./zotero.sqlite"
+]
+
+@functools.cache
+def _local_zotero_sqlite_path():
+    """Return the first existing local zotero.sqlite path, memoized per run."""
+    for path in LOCAL_ZOTERO_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+def open_zotero_db(db_path):
+    """
+    Open a Zotero SQLite database read-only with mmap-friendly pragmas.
+
+    URI mode with immutable=1 skips SQLite's locking protocol entirely (the
+    desktop client may hold the write lock), and the pragmas below serve
+    repeated queries from memory-mapped pages and a larger page cache
+    instead of syscall-heavy read() calls.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+
+    Returns:
+        sqlite3.Connection: Configured read-only connection
+    """
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro&immutable=1", uri=True)
+    except sqlite3.OperationalError:
+        # Some builds compile out URI filenames; a plain connection loses
+        # the lock-free open but keeps the search paths working
+        conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA mmap_size = 268435456")
+    conn.execute("PRAGMA cache_size = -65536")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
 def get_collections_from_sqlite(sqlite_path, verbose=False):
     """Get collections from a Zotero SQLite database file."""
     try:
-        conn = sqlite3.connect(sqlite_path)
-        conn.row_factory = sqlite3.Row
+        conn = open_zotero_db(sqlite_path)
         cur = conn.cursor()
         cur.execute("SELECT collectionID, collectionName, key FROM collections ORDER BY collectionName")
         rows = cur.fetchall()
@@ -320,58 +748,92 @@ def get_collections_from_sqlite(sqlite_path, verbose=False):
 
 def get_local_collections(verbose=False):
     """Get collections from local Zotero SQLite database."""
-    local_paths = [
-        os.path.expanduser("~/Zotero/zotero.sqlite"),
-        os.path.expanduser("~/Library/Application Support/Zotero/zotero.sqlite"),
-        os.path.expanduser("~/.zotero/zotero.sqlite"),
-        "./zotero.sqlite"
-    ]
-    
-    for path in local_paths:
-        if os.path.exists(path):
-            if verbose:
-                print_progress(f"Found local zotero.sqlite at {path}", verbose)
-            collections = get_collections_from_sqlite(path, verbose)
-            if collections:
-                return collections
-            break  # Only try first available database
+    path = _local_zotero_sqlite_path()
+    if path:
+        if verbose:
+            print_progress(f"Found local zotero.sqlite at {path}", verbose)
+        collections = get_collections_from_sqlite(path, verbose)
+        if collections:
+            return collections
     
     return []
 
+# Single-flight guard and per-run result for the Drive-resident zotero.sqlite
+_drive_sqlite_lock = threading.Lock()
+_drive_sqlite_path = None
+
+def _cached_zotero_sqlite(google_creds, verbose=False):
+    """
+    Locate and download the Drive-resident zotero.sqlite at most once.
+
+    Copies are cached under ~/.cache/zotero-list keyed by the file's Drive
+    md5Checksum, so an unchanged database is reused across runs without
+    re-transferring hundreds of megabytes. Within a run, a lock makes the
+    download single-flight: list_collections and get_items share one copy.
+
+    Args:
+        google_creds: Already authenticated Google credentials object
+        verbose (bool): Whether to display progress messages
+
+    Returns:
+        str or None: Path to a local copy of zotero.sqlite
+    """
+    global _drive_sqlite_path
+    with _drive_sqlite_lock:
+        if _drive_sqlite_path is not None:
+            return _drive_sqlite_path
+
+        drive_url = resolve_drive_urls(["zotero.sqlite"], google_creds, verbose).get("zotero.sqlite")
+        if not drive_url:
+            return None
+
+        file_id = extract_file_id_from_drive_url(drive_url)
+        if not file_id:
+            return None
+
+        drive_service = get_drive_service(google_creds)
+        try:
+            metadata = drive_service.files().get(fileId=file_id, fields='md5Checksum,modifiedTime').execute()
+            checksum = metadata.get('md5Checksum')
+            if checksum:
+                cache_dir = os.path.join(os.path.expanduser("~/.cache"), "zotero-list")
+                cached_path = os.path.join(cache_dir, f"{checksum}.sqlite")
+                if os.path.exists(cached_path):
+                    if verbose:
+                        print_progress(f"Reusing cached zotero.sqlite at {cached_path}", verbose)
+                    _drive_sqlite_path = cached_path
+                    return cached_path
+                os.makedirs(cache_dir, exist_ok=True)
+                _drive_sqlite_path = download_file_from_drive(drive_service, file_id, output_path=cached_path, verbose=verbose)
+                return _drive_sqlite_path
+        except Exception as e:
+            if verbose:
+                print_progress(f"Drive metadata lookup failed: {e}", verbose, file=sys.stderr)
+
+        # No checksum available; fall back to a plain temp-file download
+        _drive_sqlite_path = download_file_from_drive(drive_service, file_id, verbose=verbose)
+        return _drive_sqlite_path
+
 def get_gdrive_collections(google_creds, verbose=False):
     """Get collections from Google Drive SQLite database."""
     if not google_creds:
         return []
-        
+
     try:
         if verbose:
             print_progress("Searching for zotero.sqlite in Google Drive...", verbose)
-            
-        drive_service = build('drive', 'v3', credentials=google_creds)
-        drive_url = get_drive_url_by_filename(google_creds, "zotero.sqlite", exact_match=True, verbose=verbose)
-        
-        if drive_url:
-            file_id = extract_file_id_from_drive_url(drive_url)
-            if file_id:
-                temp_path = download_file_from_drive(drive_service, file_id, verbose=verbose)
-                
-                if temp_path and os.path.exists(temp_path):
-                    collections = get_collections_from_sqlite(temp_path, verbose)
-                    
-                    # Clean up temp file
-                    try:
-                        os.remove(temp_path)
-                    except Exception:
-                        pass
-                    
-                    return collections
+
+        temp_path = _cached_zotero_sqlite(google_creds, verbose)
+
+        if temp_path and os.path.exists(temp_path):
+            return get_collections_from_sqlite(temp_path, verbose)
     except Exception as e:
         if verbose:
             print_progress(f"Error accessing Google Drive: {e}", verbose, file=sys.stderr)
-    
+
     return []
 
-def list_collections(zot, verbose=False):
+def list_collections(zot, google_creds=None, verbose=False):
     """
     List all collections in the Zotero library with priority:
     1. Local Zotero database
@@ -380,6 +842,7 @@ def list_collections(zot, verbose=False):
     
     Args:
         zot: Zotero API client instance
+        google_creds: Google API credentials object (optional)
         verbose (bool): Whether to display progress messages
     
     Returns:
@@ -392,8 +855,6 @@ def list_collections(zot, verbose=False):
     
     # Step 2: Try Google Drive
     try:
-        # Get google_creds from global scope if available
-        google_creds = globals().get('google_creds', None)
         collections = get_gdrive_collections(google_creds, verbose)
         if collections:
             return collections
@@ -410,10 +871,9 @@ def list_collections(zot, verbose=False):
     return collections
 
 def get_items_from_sqlite(db_path, collection=None, item_type=None, verbose=False):
-    """Get items from a Zotero SQLite database file."""
+    """Yield items from a Zotero SQLite database file (generator)."""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = open_zotero_db(db_path)
         cur = conn.cursor()
         
         # Base query for retrieving items
@@ -445,49 +905,41 @@ def get_items_from_sqlite(db_path, collection=None, item_type=None, verbose=Fals
             sql += " AND itemTypes.typeName = ?"
             params.append(item_type)
             
-        # Execute query
+        # Execute query and stream rows in batches instead of materializing
+        # everything with fetchall(); positional indexing skips the
+        # sqlite3.Row name lookup per field
         cur.execute(sql, params)
-        rows = cur.fetchall()
-        
-        # Convert to format similar to Zotero API
-        items = []
-        for row in rows:
-            items.append({
-                'key': row['key'],
-                'data': {
-                    'title': row.get('title', 'Unknown'),
-                    'itemType': row['typeName']
+
+        count = 0
+        while rows := cur.fetchmany(1000):
+            for row in rows:
+                count += 1
+                yield {
+                    'key': row[1],
+                    'data': {
+                        'title': row[3] or 'Unknown',
+                        'itemType': row[2]
+                    }
                 }
-            })
-        
+
         conn.close()
-        
+
         if verbose:
-            print_progress(f"Found {len(items)} items in SQLite database", verbose)
-        return items
-        
+            print_progress(f"Found {count} items in SQLite database", verbose)
+
     except Exception as e:
         if verbose:
             print_progress(f"Error querying SQLite database: {e}", verbose, file=sys.stderr)
-        return []
 
 def get_items_from_local_db(collection=None, item_type=None, verbose=False):
     """Get items from local Zotero SQLite database."""
-    local_paths = [
-        os.path.expanduser("~/Zotero/zotero.sqlite"),
-        os.path.expanduser("~/Library/Application Support/Zotero/zotero.sqlite"),
-        os.path.expanduser("~/.zotero/zotero.sqlite"),
-        "./zotero.sqlite"
-    ]
-    
-    for path in local_paths:
-        if os.path.exists(path):
-            if verbose:
-                print_progress(f"Found local zotero.sqlite at {path}", verbose)
-            items = get_items_from_sqlite(path, collection, item_type, verbose)
-            if items:
-                return items
-            break  # Only try first available database
+    path = _local_zotero_sqlite_path()
+    if path:
+        if verbose:
+            print_progress(f"Found local zotero.sqlite at {path}", verbose)
+        items = list(get_items_from_sqlite(path, collection, item_type, verbose))
+        if items:
+            return items
     
     return []
 
@@ -499,32 +951,18 @@ def get_items_from_gdrive(google_creds, collection=None, item_type=None, verbose
     try:
         if verbose:
             print_progress("Searching for zotero.sqlite in Google Drive...", verbose)
-            
-        drive_service = build('drive', 'v3', credentials=google_creds)
-        drive_url = get_drive_url_by_filename(google_creds, "zotero.sqlite", exact_match=True, verbose=verbose)
-        
-        if drive_url:
-            file_id = extract_file_id_from_drive_url(drive_url)
-            if file_id:
-                temp_path = download_file_from_drive(drive_service, file_id, verbose=verbose)
-                
-                if temp_path and os.path.exists(temp_path):
-                    items = get_items_from_sqlite(temp_path, collection, item_type, verbose)
-                    
-                    # Clean up temp file
-                    try:
-                        os.remove(temp_path)
-                    except Exception:
-                        pass
-                    
-                    return items
+
+        temp_path = _cached_zotero_sqlite(google_creds, verbose)
+
+        if temp_path and os.path.exists(temp_path):
+            return list(get_items_from_sqlite(temp_path, collection, item_type, verbose))
     except Exception as e:
         if verbose:
             print_progress(f"Error accessing Google Drive: {e}", verbose, file=sys.stderr)
-    
+
     return []
 
-def get_items(zot, collection=None, item_type=None, verbose=True):
+def get_items(zot, collection=None, item_type=None, verbose=True, google_creds=None):
     """
     Retrieve all items based on filters with priority:
     1. Local Zotero database
@@ -538,8 +976,6 @@ def get_items(zot, collection=None, item_type=None, verbose=True):
     
     # Step 2: Try Google Drive
     try:
-        # Get google_creds from global scope if available
-        google_creds = globals().get('google_creds', None)
         if google_creds:
             items = get_items_from_gdrive(google_creds, collection, item_type, verbose)
             if items:
@@ -566,14 +1002,15 @@ def get_items(zot, collection=None, item_type=None, verbose=True):
             else:
                 items = zot.everything(zot.items())
                 
-        # Filter out notes and attachments
-        filtered_items = [item for item in items if item['data'].get('itemType') not in ['note', 'attachment']]
-        
-        # Remove relations field from each item
-        for item in filtered_items:
-            if 'relations' in item['data']:
-                del item['data']['relations']
-                
+        # Filter out notes and attachments and drop the (often large)
+        # relations field in a single pass over the response
+        filtered_items = [
+            {'key': item['key'],
+             'data': {k: v for k, v in item['data'].items() if k != 'relations'}}
+            for item in items
+            if item['data'].get('itemType') not in ('note', 'attachment')
+        ]
+
         if verbose:
             print_progress(f"Retrieved {len(filtered_items)} items via online API", verbose)
             
@@ -584,90 +1021,200 @@ def get_items(zot, collection=None, item_type=None, verbose=True):
             print_progress(f"Error retrieving items from online API: {e}", verbose, file=sys.stderr)
         return []
 
-def get_attachment_paths(zot, item, google_creds=None, verbose=False):
+# Attachment content types worth exporting (PDF, DJVU, EPUB, AZW3, MOBI, ...);
+# the IN-list placeholders are built once so the statement text stays stable
+_SUPPORTED_CONTENT_TYPES = frozenset({
+    'application/pdf', 'image/vnd.djvu', 'video/mp4',
+    'application/vnd.ms-powerpoint', 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'application/epub+zip', 'application/vnd.amazon.ebook',
+    'application/x-mobi8-ebook', 'application/x-mobipocket-ebook',
+    'application/vnd.comicbook+zip', 'application/x-cbr',
+    'application/x-fictionbook+xml', 'text/plain'
+})
+_SUPPORTED_CT_PARAMS = tuple(sorted(_SUPPORTED_CONTENT_TYPES))
+_SUPPORTED_CT_SQL = ','.join('?' * len(_SUPPORTED_CT_PARAMS))
+
+def get_all_attachments_from_sqlite(db_path, item_keys, verbose=False):
+    """
+    Fetch attachments for many items with one SQLite connection.
+
+    Calling get_attachment_paths in a loop opens the database and runs a
+    query once per item; this helper opens it once and resolves all parent
+    keys with batched IN-list queries (500 keys per statement).
+
+    Args:
+        db_path (str): Path to the Zotero SQLite database file
+        item_keys (list): Parent item keys to fetch attachments for
+        verbose (bool): Whether to display progress messages
+
+    Returns:
+        dict: Mapping of parent item key to a list of attachment dicts
+              with 'key' and 'filename'
+    """
+    by_parent = {}
+    try:
+        conn = open_zotero_db(db_path)
+        cur = conn.cursor()
+
+        keys = list(item_keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cur.execute(f"""
+                SELECT att.key, att.contentType, att.path, parents.key AS parentKey, att.filename
+                FROM itemAttachments AS att
+                JOIN items AS parents ON att.parentItemID = parents.itemID
+                WHERE parents.key IN ({placeholders})
+                AND att.contentType IN ({_SUPPORTED_CT_SQL})
+            """, chunk + list(_SUPPORTED_CT_PARAMS))
+
+            for row in cur.fetchall():
+                by_parent.setdefault(row['parentKey'], []).append({
+                    'key': row['key'],
+                    'filename': row['filename']
+                })
+
+        conn.close()
+
+        if verbose:
+            print_progress(f"Found attachments for {len(by_parent)} items in local database", verbose)
+    except Exception as e:
+        if verbose:
+            print_progress(f"Error bulk-querying local database for attachments: {e}", verbose, file=sys.stderr)
+
+    return by_parent
+
+def load_all_attachments(db_path, verbose=False):
+    """
+    Load every supported attachment row in one full-table pass.
+
+    For whole-library exports a single scan beats hundreds of keyed IN-list
+    batches; the result feeds get_attachment_paths via its attachments_table
+    argument.
+
+    Args:
+        db_path (str): Path to the Zotero SQLite database file
+        verbose (bool): Whether to display progress messages
+
+    Returns:
+        dict: Mapping of parent item key to a list of attachment dicts
+              with 'key' and 'filename'
+    """
+    by_parent = {}
+    try:
+        conn = open_zotero_db(db_path)
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT att.key, att.filename, parents.key AS parentKey
+            FROM itemAttachments AS att
+            JOIN items AS parents ON att.parentItemID = parents.itemID
+            WHERE att.contentType IN ({_SUPPORTED_CT_SQL})
+        """, _SUPPORTED_CT_PARAMS)
+
+        for row in cur.fetchall():
+            by_parent.setdefault(row['parentKey'], []).append({
+                'key': row['key'],
+                'filename': row['filename']
+            })
+
+        conn.close()
+
+        if verbose:
+            print_progress(f"Loaded attachments for {len(by_parent)} items in one pass", verbose)
+    except Exception as e:
+        if verbose:
+            print_progress(f"Error loading attachment table: {e}", verbose, file=sys.stderr)
+
+    return by_parent
+
+def _prefetch_attachments(items, verbose=False):
+    """
+    Load attachment rows for a list of items in one pass over the local database.
+
+    Args:
+        items (list): Zotero items whose attachments should be prefetched
+        verbose (bool): Whether to display progress messages
+
+    Returns:
+        dict or None: Parent key -> attachment rows, or None when no local
+                      database is available (callers fall back to per-item lookups)
+    """
+    db_path = _local_zotero_sqlite_path()
+    if db_path:
+        # Past a few hundred items one full-table scan is cheaper than
+        # batched keyed queries
+        if len(items) > 200:
+            return load_all_attachments(db_path, verbose)
+        return get_all_attachments_from_sqlite(db_path, [item['key'] for item in items], verbose)
+
+    return None
+
+def get_attachment_paths(zot, item, google_creds=None, verbose=False, attachments_table=None):
     """
     Get attachment paths for a given item and their Google Drive URLs if available.
     Supports various file types including PDF, DJVU, EPUB, AZW3, MOBI and more.
-    
+
     Args:
         zot: Zotero API client instance
         item: Zotero item to get attachments for
         google_creds: Google API credentials object (already authenticated)
         verbose (bool): Whether to display progress messages
-    
+        attachments_table (dict, optional): Prefetched parent-key -> attachment
+            rows from get_all_attachments_from_sqlite; skips the per-item query
+
     Returns:
         list: A list of dictionaries with keys 'local_path' and 'drive_url' (None if not found)
     """
     if not item:
         return []
-    
+
     attachment_info = []
-    
+
+    # Serve from the prefetched table when the caller supplied one
+    if attachments_table is not None and item['key'] in attachments_table:
+        entries = [(row['key'], row['filename']) for row in attachments_table[item['key']]]
+        drive_urls = resolve_drive_urls([filename for _, filename in entries], google_creds, verbose)
+        return [{'local_path': f"storage/{attachment_id}/{filename}",
+                 'drive_url': drive_urls.get(filename)}
+                for attachment_id, filename in entries]
+
     # Try to get attachments from local database first
-    try:
-        local_paths = [
-            os.path.expanduser("~/Zotero/zotero.sqlite"),
-            os.path.expanduser("~/Library/Application Support/Zotero/zotero.sqlite"),
-            os.path.expanduser("~/.zotero/zotero.sqlite"),
-            "./zotero.sqlite"
-        ]
-        
-        for db_path in local_paths:
-            if os.path.exists(db_path):
-                conn = sqlite3.connect(db_path)
-                conn.row_factory = sqlite3.Row
-                cur = conn.cursor()
-                
-                # Get attachments from SQLite database
-                cur.execute("""
-                    SELECT att.itemID, att.key, att.contentType, att.path, items.key as parentKey, att.filename
-                    FROM itemAttachments AS att
-                    JOIN items ON att.itemID = items.itemID
-                    WHERE att.parentItemID = (SELECT itemID FROM items WHERE key = ?)
-                    AND att.contentType IN (
-                        'application/pdf', 'image/vnd.djvu', 'video/mp4',
-                        'application/vnd.ms-powerpoint', 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-                        'application/epub+zip', 'application/vnd.amazon.ebook',
-                        'application/x-mobi8-ebook', 'application/x-mobipocket-ebook',
-                        'application/vnd.comicbook+zip', 'application/x-cbr',
-                        'application/x-fictionbook+xml', 'text/plain'
-                    )
-                """, (item['key'],))
-                
-                rows = cur.fetchall()
-                conn.close()
-                
-                if rows:
-                    if verbose:
-                        print_progress(f"Found {len(rows)} attachments in local database", verbose)
-                    
-                    for row in rows:
-                        attachment_id = row['key']
-                        filename = row['filename']
-                        local_path = f"storage/{attachment_id}/{filename}"
-                        
-                        # Initialize with local path only
-                        info = {'local_path': local_path, 'drive_url': None}
-                        
-                        # If Google credentials are provided, search in Drive
-                        if google_creds:
-                            try:
-                                drive_url = get_drive_url_by_filename(
-                                    google_creds, 
-                                    filename, 
-                                    exact_match=True,
-                                    verbose=verbose
-                                )
-                                if drive_url:
-                                    info['drive_url'] = drive_url
-                            except Exception as e:
-                                if verbose:
-                                    print_progress(f"Error searching Google Drive for {filename}: {e}", verbose, file=sys.stderr)
-                        
-                        attachment_info.append(info)
-                    
-                    return attachment_info
-                break  # Only try first available database
+    try:
+        db_path = _local_zotero_sqlite_path()
+        if db_path:
+            conn = open_zotero_db(db_path)
+            cur = conn.cursor()
+            
+            # Get attachments from SQLite database; joining the parent row
+            # lets SQLite resolve the key with one index seek instead of a
+            # correlated subquery
+            cur.execute(f"""
+                SELECT att.key, att.contentType, att.path, parents.key AS parentKey, att.filename
+                FROM itemAttachments AS att
+                JOIN items AS parents ON att.parentItemID = parents.itemID
+                WHERE parents.key = ?
+                AND att.contentType IN ({_SUPPORTED_CT_SQL})
+            """, (item['key'],) + _SUPPORTED_CT_PARAMS)
+            
+            rows = cur.fetchall()
+            conn.close()
+            
+            if rows:
+                if verbose:
+                    print_progress(f"Found {len(rows)} attachments in local database", verbose)
+
+                # Collect filenames first so the Drive lookups can run in parallel
+                entries = [(row['key'], row['filename']) for row in rows]
+                drive_urls = resolve_drive_urls([filename for _, filename in entries], google_creds, verbose)
+
+                for attachment_id, filename in entries:
+                    local_path = f"storage/{attachment_id}/{filename}"
+                    attachment_info.append({
+                        'local_path': local_path,
+                        'drive_url': drive_urls.get(filename)
+                    })
+
+                return attachment_info
     
     except Exception as e:
         if verbose:
@@ -676,63 +1223,84 @@ def get_attachment_paths(zot, item, google_creds=None, verbose=False):
     # Fall back to API if no local attachments found
     try:
         attachments = zot.children(item['key'])
-        
+        entries = []
+
         for attachment in attachments:
             # Check if it's an attachment of supported type
             if attachment['data'].get('itemType') == 'attachment' and 'contentType' in attachment['data']:
                 content_type = attachment['data']['contentType']
-                if content_type in [
-                    'application/pdf', 
-                    'image/vnd.djvu',
-                    'video/mp4',
-                    'application/vnd.ms-powerpoint',
-                    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-                    'application/epub+zip',
-                    'application/vnd.amazon.ebook',
-                    'application/x-mobi8-ebook',
-                    'application/x-mobipocket-ebook',
-                    'application/vnd.comicbook+zip',
-                    'application/x-cbr',
-                    'application/x-fictionbook+xml',
-                    'text/plain'
-                ]:
+                if content_type in _SUPPORTED_CONTENT_TYPES:
                     # Get the file information
                     if 'key' in attachment and 'filename' in attachment['data']:
-                        attachment_id = attachment['key']
-                        filename = attachment['data']['filename']
-                        local_path = f"storage/{attachment_id}/{filename}"
-                        
-                        # Initialize with local path only
-                        info = {'local_path': local_path, 'drive_url': None}
-                        
-                        # If Google credentials are provided, search in Drive
-                        if google_creds:
-                            if verbose:
-                                print_progress(f"Searching for {filename} in Google Drive", verbose)
-                            try:
-                                # Search using Google credentials
-                                drive_url = get_drive_url_by_filename(
-                                    google_creds, 
-                                    filename, 
-                                    exact_match=True,
-                                    folder_name=None, 
-                                    verbose=verbose
-                                )
-                                if drive_url:
-                                    info['drive_url'] = drive_url
-                                    if verbose:
-                                        print_progress(f"Found Google Drive URL for {filename}", verbose)
-                            except Exception as e:
-                                if verbose:
-                                    print_progress(f"Error searching Google Drive for {filename}: {e}", verbose, file=sys.stderr)
-                        
-                        attachment_info.append(info)
-    
+                        entries.append((attachment['key'], attachment['data']['filename']))
+
+        # Resolve all Drive URLs in one parallel pass
+        drive_urls = resolve_drive_urls([filename for _, filename in entries], google_creds, verbose)
+
+        for attachment_id, filename in entries:
+            local_path = f"storage/{attachment_id}/{filename}"
+            attachment_info.append({
+                'local_path': local_path,
+                'drive_url': drive_urls.get(filename)
+            })
+
     except Exception as e:
         print(f"Error getting attachments for item {item.get('data', {}).get('title', 'Unknown')}: {e}", file=sys.stderr)
     
     return attachment_info
 
+def get_all_attachment_paths(zot, items, google_creds=None, verbose=False, attachments_table=None):
+    """
+    Resolve attachment paths and Google Drive URLs for many items at once.
+
+    All filenames found in the prefetched attachment table are handed to
+    resolve_drive_urls in a single call, so the whole library shares one
+    Drive lookup pass instead of one per item.
+
+    Args:
+        zot: Zotero API client instance
+        items: Iterable of Zotero items
+        google_creds: Google API credentials object (already authenticated)
+        verbose (bool): Whether to display progress messages
+        attachments_table (dict, optional): Prefetched parent-key -> attachment
+            rows; fetched via _prefetch_attachments when omitted
+
+    Returns:
+        dict: item key -> list of {'local_path', 'drive_url'} dictionaries
+    """
+    if attachments_table is None:
+        attachments_table = _prefetch_attachments(items, verbose)
+
+    att_map = {}
+    entries_by_key = {}
+    pending = []
+    for item in items:
+        key = item.get('key')
+        if not key:
+            continue
+        if attachments_table and key in attachments_table:
+            entries = [(row['key'], row['filename']) for row in attachments_table[key]]
+            entries_by_key[key] = entries
+            pending.extend(filename for _, filename in entries)
+        else:
+            # Not in the bulk table; fall back to the per-item lookup
+            att_map[key] = get_attachment_paths(zot, item, google_creds, verbose)
+
+    if entries_by_key:
+        drive_urls = resolve_drive_urls(pending, google_creds, verbose)
+        for key, entries in entries_by_key.items():
+            att_map[key] = [{'local_path': f"storage/{attachment_id}/{filename}",
+                             'drive_url': drive_urls.get(filename)}
+                            for attachment_id, filename in entries]
+
+    return att_map
+
+# Compiled once: matching runs per item, and re-parsing the pattern on every
+# call costs more than the search itself for short fields
+_DOI_RE = re.compile(r'(10\.\d{4,}(?:\.\d+)*\/(?:(?!["&\'])\S)+)')
+_DOI_LINE_RE = re.compile(r'(?im)^\s*doi:\s*(\S+)')
+_ARXIV_RE = re.compile(r'(?m)^\s*arXiv:\s*(\S+)')
+
 def extract_doi(item):
     """
     Extract DOI from a Zotero item by examining URL and Extra fields.
@@ -747,12 +1315,13 @@ def extract_doi(item):
         return None
     
     doi = None
-    
-    # Check if DOI is directly available in the DOI field
-    if 'DOI' in item['data'] and item['data']['DOI']:
-        doi = item['data']['DOI']
-        return doi
-    
+
+    # Fast path: most journal articles carry a structured DOI field, so
+    # return it in one lookup before any URL or extra parsing
+    direct = item['data'].get('DOI')
+    if direct:
+        return direct.strip()
+
     # Check URL field for DOI
     if 'url' in item['data'] and item['data']['url']:
         url = item['data']['url']
@@ -765,7 +1334,7 @@ def extract_doi(item):
             return doi
         
         # Look for DOI pattern in URL
-        doi_match = re.search(r'(10\.\d{4,}(?:\.\d+)*\/(?:(?!["&\'])\S)+)', url)
+        doi_match = _DOI_RE.search(url)
         if doi_match:
             return doi_match.group(0)
     
@@ -774,30 +1343,38 @@ def extract_doi(item):
         extra = item['data']['extra']
         
         # Look for lines starting with DOI:
-        for line in extra.split('\n'):
-            line = line.strip()
-            if line.lower().startswith('doi:'):
-                doi = line[4:].strip()
-                return doi
-        
+        doi_line = _DOI_LINE_RE.search(extra)
+        if doi_line:
+            return doi_line.group(1)
+
         # Try regex for DOI pattern in Extra field
-        doi_match = re.search(r'(10\.\d{4,}(?:\.\d+)*\/(?:(?!["&\'])\S)+)', extra)
+        doi_match = _DOI_RE.search(extra)
         if doi_match:
             return doi_match.group(0)
     
     return doi
 
-def format_item_text(item, zot, google_creds=None, verbose=False):
+# Labelled fields shared by the text and HTML formatters: one d.get() per
+# field instead of an "if key in d and d[key]" double lookup per line
+_FIELDS_COMMON = (('Date', 'date'),)
+_FIELDS_BY_TYPE = {
+    'book': (('Publisher', 'publisher'), ('Place', 'place'), ('ISBN', 'ISBN')),
+    'journalArticle': (('Journal', 'publicationTitle'), ('Volume', 'volume'),
+                       ('Issue', 'issue'), ('Pages', 'pages')),
+}
+
+def format_item_text(item, zot, google_creds=None, verbose=False, attachments=None):
     """Format a single item for text output with proper Unicode support."""
+    d = item['data']
     output = []
     # Use Unicode strings for all text content
-    output.append(f"Title: {item['data'].get('title', 'Unknown')}")
-    output.append(f"Type: {item['data'].get('itemType', 'Unknown')}")
+    output.append(f"Title: {d.get('title', 'Unknown')}")
+    output.append(f"Type: {d.get('itemType', 'Unknown')}")
     
     # Format authors
-    if 'creators' in item['data'] and item['data']['creators']:
+    if 'creators' in d and d['creators']:
         authors = []
-        for creator in item['data']['creators']:
+        for creator in d['creators']:
             if 'lastName' in creator and 'firstName' in creator:
                 authors.append(f"{creator['lastName']}, {creator['firstName']}")
             elif 'name' in creator:
@@ -805,41 +1382,25 @@ def format_item_text(item, zot, google_creds=None, verbose=False):
         if authors:
             output.append(f"Authors: {'; '.join(authors)}")
     
-    if 'date' in item['data'] and item['data']['date']:
-        output.append(f"Date: {item['data']['date']}")
-    
-    # Type-specific fields
-    item_type = item['data'].get('itemType')
-    if item_type == 'book':
-        if 'publisher' in item['data'] and item['data']['publisher']:
-            output.append(f"Publisher: {item['data']['publisher']}")
-        if 'place' in item['data'] and item['data']['place']:
-            output.append(f"Place: {item['data']['place']}")
-        if 'ISBN' in item['data'] and item['data']['ISBN']:
-            output.append(f"ISBN: {item['data']['ISBN']}")
-    elif item_type == 'journalArticle':
-        if 'publicationTitle' in item['data'] and item['data']['publicationTitle']:
-            output.append(f"Journal: {item['data']['publicationTitle']}")
-        if 'volume' in item['data'] and item['data']['volume']:
-            output.append(f"Volume: {item['data']['volume']}")
-        if 'issue' in item['data'] and item['data']['issue']:
-            output.append(f"Issue: {item['data']['issue']}")
-        if 'pages' in item['data'] and item['data']['pages']:
-            output.append(f"Pages: {item['data']['pages']}")
-    elif item_type == 'manuscript':
-        # Add arXiv URL for manuscripts
-        if 'url' in item['data'] and item['data']['url'] and 'arxiv.org' in item['data']['url']:
-            output.append(f"arXiv URL: {item['data']['url']}")
-        # Check if there's an arXiv ID in extra field
-        if 'extra' in item['data'] and item['data']['extra']:
-            extra = item['data']['extra']
-            if 'arXiv:' in extra:
-                for line in extra.split('\n'):
-                    if line.strip().startswith('arXiv:'):
-                        arxiv_id = line.strip().replace('arXiv:', '').strip()
-                        output.append(f"arXiv ID: {arxiv_id}")
-                        if 'url' not in item['data'] or 'arxiv.org' not in item['data']['url']:
-                            output.append(f"arXiv URL: https://arxiv.org/abs/{arxiv_id}")
+    # Date plus type-specific fields, driven by the shared field table
+    item_type = d.get('itemType')
+    for label, key in _FIELDS_COMMON + _FIELDS_BY_TYPE.get(item_type, ()):
+        value = d.get(key)
+        if value:
+            output.append(f"{label}: {value}")
+    if item_type == 'manuscript':
+        # Add arXiv URL for manuscripts; test the URL once
+        url = d.get('url') or ''
+        is_arxiv_url = 'arxiv.org' in url
+        if is_arxiv_url:
+            output.append(f"arXiv URL: {url}")
+        # First arXiv line in extra, matched in one regex pass
+        arxiv_match = _ARXIV_RE.search(d.get('extra') or '')
+        if arxiv_match:
+            arxiv_id = arxiv_match.group(1)
+            output.append(f"arXiv ID: {arxiv_id}")
+            if not is_arxiv_url:
+                output.append(f"arXiv URL: https://arxiv.org/abs/{arxiv_id}")
     
     # Extract DOI using the extract_doi function
     doi = extract_doi(item)
@@ -847,7 +1408,8 @@ def format_item_text(item, zot, google_creds=None, verbose=False):
         output.append(f"DOI: {doi}")
     
     # Add attachment paths and Google Drive URLs
-    attachments = get_attachment_paths(zot, item, google_creds, verbose)
+    if attachments is None:
+        attachments = get_attachment_paths(zot, item, google_creds, verbose)
     if attachments:
         output.append("Attachments:")
         for attachment in attachments:
@@ -859,91 +1421,83 @@ def format_item_text(item, zot, google_creds=None, verbose=False):
             else:
                 output.append(f"  - {local_path}")
     
-    # Join all lines with Unicode newlines and ensure the result is Unicode
-    return "\n".join(output)
+    # Return the line list; the top-level generator joins everything once
+    return output
 
-def format_item_html(item, zot, google_creds=None, verbose=False):
-    """Format a single item for HTML output."""
-    # Use html.escape for all text content to handle Unicode properly
-    
-    # Start with basic item info
-    html_parts = [f"<div class='item {html.escape(item['data'].get('itemType', ''))}'>"
-            f"<h2>{html.escape(item['data'].get('title', 'Unknown'))}</h2>"]
-    
-    html_parts.append(f"<p><strong>Type:</strong> {html.escape(item['data'].get('itemType', 'Unknown'))}</p>")
-    
-    # Format authors
-    if 'creators' in item['data'] and item['data']['creators']:
+def format_item_html(item, zot, google_creds=None, verbose=False, attachments=None):
+    """Format a single item for HTML output as one string."""
+    # Use html.escape for all text content to handle Unicode properly;
+    # bind hot lookups to locals once per item
+    d = item['data']
+    esc = html.escape
+    itype = d.get('itemType', 'Unknown')
+    itype_esc = esc(itype)
+
+    # Each optional segment is an empty string or starts with its own
+    # newline, so the final f-string is the only per-item concatenation
+    authors_html = ''
+    if 'creators' in d and d['creators']:
         authors = []
-        for creator in item['data']['creators']:
+        for creator in d['creators']:
             if 'lastName' in creator and 'firstName' in creator:
-                authors.append(f"{html.escape(creator['lastName'])}, {html.escape(creator['firstName'])}")
+                authors.append(f"{esc(creator['lastName'])}, {esc(creator['firstName'])}")
             elif 'name' in creator:
-                authors.append(html.escape(creator['name']))
+                authors.append(esc(creator['name']))
         if authors:
-            html_parts.append(f"<p><strong>Authors:</strong> {html.escape('; '.join(authors))}</p>")
-    
-    if 'date' in item['data'] and item['data']['date']:
-        html_parts.append(f"<p><strong>Date:</strong> {html.escape(item['data']['date'])}</p>")
-    
-    # Type-specific fields
-    item_type = item['data'].get('itemType')
-    if item_type == 'book':
-        if 'publisher' in item['data'] and item['data']['publisher']:
-            html_parts.append(f"<p><strong>Publisher:</strong> {html.escape(item['data']['publisher'])}</p>")
-        if 'place' in item['data'] and item['data']['place']:
-            html_parts.append(f"<p><strong>Place:</strong> {html.escape(item['data']['place'])}</p>")
-        if 'ISBN' in item['data'] and item['data']['ISBN']:
-            html_parts.append(f"<p><strong>ISBN:</strong> {html.escape(item['data']['ISBN'])}</p>")
-    elif item_type == 'journalArticle':
-        if 'publicationTitle' in item['data'] and item['data']['publicationTitle']:
-            html_parts.append(f"<p><strong>Journal:</strong> {html.escape(item['data']['publicationTitle'])}</p>")
-        if 'volume' in item['data'] and item['data']['volume']:
-            html_parts.append(f"<p><strong>Volume:</strong> {html.escape(item['data']['volume'])}</p>")
-        if 'issue' in item['data'] and item['data']['issue']:
-            html_parts.append(f"<p><strong>Issue:</strong> {html.escape(item['data']['issue'])}</p>")
-        if 'pages' in item['data'] and item['data']['pages']:
-            html_parts.append(f"<p><strong>Pages:</strong> {html.escape(item['data']['pages'])}</p>")
-    elif item_type == 'manuscript':
-        # Add arXiv URL for manuscripts
-        if 'url' in item['data'] and item['data']['url'] and 'arxiv.org' in item['data']['url']:
-            html_parts.append(f"<p><strong>arXiv URL:</strong> <a href='{html.escape(item['data']['url'])}' target='_blank'>{html.escape(item['data']['url'])}</a></p>")
-        # Check if there's an arXiv ID in extra field
-        if 'extra' in item['data'] and item['data']['extra']:
-            extra = item['data']['extra']
-            if 'arXiv:' in extra:
-                for line in extra.split('\n'):
-                    if line.strip().startswith('arXiv:'):
-                        arxiv_id = line.strip().replace('arXiv:', '').strip()
-                        html_parts.append(f"<p><strong>arXiv ID:</strong> {html.escape(arxiv_id)}</p>")
-                        if 'url' not in item['data'] or 'arxiv.org' not in item['data']['url']:
-                            arxiv_url = f"https://arxiv.org/abs/{arxiv_id}"
-                            html_parts.append(f"<p><strong>arXiv URL:</strong> <a href='{html.escape(arxiv_url)}' target='_blank'>{html.escape(arxiv_url)}</a></p>")
-    
+            authors_html = f"\n<p><strong>Authors:</strong> {'; '.join(authors)}</p>"
+
+    # Date plus type-specific fields, driven by the shared field table
+    fields_html = ''.join(
+        f"\n<p><strong>{label}:</strong> {esc(value)}</p>"
+        for label, key in _FIELDS_COMMON + _FIELDS_BY_TYPE.get(itype, ())
+        if (value := d.get(key)))
+
+    arxiv_html = ''
+    if itype == 'manuscript':
+        # Add arXiv URL for manuscripts; test the URL once
+        url = d.get('url') or ''
+        is_arxiv_url = 'arxiv.org' in url
+        if is_arxiv_url:
+            url_esc = esc(url)
+            arxiv_html += f"\n<p><strong>arXiv URL:</strong> <a href='{url_esc}' target='_blank'>{url_esc}</a></p>"
+        # First arXiv line in extra, matched in one regex pass
+        arxiv_match = _ARXIV_RE.search(d.get('extra') or '')
+        if arxiv_match:
+            arxiv_id = arxiv_match.group(1)
+            arxiv_html += f"\n<p><strong>arXiv ID:</strong> {esc(arxiv_id)}</p>"
+            if not is_arxiv_url:
+                arxiv_url = f"https://arxiv.org/abs/{arxiv_id}"
+                arxiv_html += f"\n<p><strong>arXiv URL:</strong> <a href='{esc(arxiv_url)}' target='_blank'>{esc(arxiv_url)}</a></p>"
+
     # Extract DOI using extract_doi function
     doi = extract_doi(item)
+    doi_html = ''
     if doi:
-        doi_escaped = html.escape(doi)
-        doi_url = f"https://doi.org/{doi_escaped}"
-        html_parts.append(f"<p><strong>DOI:</strong> <a href='{doi_url}' target='_blank'>{doi_escaped}</a></p>")
-    
+        doi_esc = esc(doi)
+        doi_html = f"\n<p><strong>DOI:</strong> <a href='https://doi.org/{doi_esc}' target='_blank'>{doi_esc}</a></p>"
+
     # Add attachment paths with Google Drive links
-    attachments = get_attachment_paths(zot, item, google_creds, verbose)
+    if attachments is None:
+        attachments = get_attachment_paths(zot, item, google_creds, verbose)
+    attachments_html = ''
     if attachments:
-        html_parts.append("<p><strong>Attachments:</strong></p>")
-        html_parts.append("<ul>")
-        for attachment in attachments:
-            local_path = html.escape(attachment.get('local_path', 'Unknown'))
-            drive_url = attachment.get('drive_url')
-            
-            if drive_url:
-                html_parts.append(f"<li>{local_path} - <a href='{html.escape(drive_url)}' target='_blank'>View on Google Drive</a></li>")
-            else:
-                html_parts.append(f"<li>{local_path}</li>")
-        html_parts.append("</ul>")
-    
-    html_parts.append("</div>")
-    return "\n".join(html_parts)
+        items_html = ''.join(
+            f"\n<li>{esc(a.get('local_path', 'Unknown'))} - <a href='{esc(a['drive_url'])}' target='_blank'>View on Google Drive</a></li>"
+            if a.get('drive_url') else
+            f"\n<li>{esc(a.get('local_path', 'Unknown'))}</li>"
+            for a in attachments)
+        attachments_html = f"\n<p><strong>Attachments:</strong></p>\n<ul>{items_html}\n</ul>"
+
+    return [f"<div class='item {itype_esc}'><h2>{esc(d.get('title', 'Unknown'))}</h2>\n"
+            f"<p><strong>Type:</strong> {itype_esc}</p>"
+            f"{authors_html}{fields_html}{arxiv_html}{doi_html}{attachments_html}\n</div>"]
+
+def _items_page_title(collection_name=None):
+    """Build the dated page title, reading the clock exactly once."""
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    if collection_name:
+        return f"Zotero Collection: {collection_name} - {current_date}".title()
+    return f"Zotero Items - {current_date}".title()
 
 def generate_text_output(items, zot, collection_name=None, google_creds=None, verbose=False):
     """Generate complete text document from items with proper Unicode support."""
@@ -951,11 +1505,7 @@ def generate_text_output(items, zot, collection_name=None, google_creds=None, ve
     if verbose:
         print_progress("Starting text output generation", verbose)
     
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    title = f"Zotero Items - {current_date}".title()
-    if collection_name:
-        title = f"Zotero Collection: {collection_name} - {current_date}".title()
-        
+    title = _items_page_title(collection_name)
     header = [
         title,
         "=" * len(title),
@@ -963,53 +1513,91 @@ def generate_text_output(items, zot, collection_name=None, google_creds=None, ve
     ]
     
     if verbose:
-        print_progress(f"Preparing to format {len(items)} items simultaneously", verbose)
-    
+        print_progress(f"Formatting {len(items)} items", verbose)
+
+    # Resolve every attachment path and Drive URL in one bulk pass
+    att_map = get_all_attachment_paths(zot, items, google_creds, verbose)
+
     # Helper function to format a single item
     def format_single_item(idx, item):
         try:
-            item_header = f"{collection_name} #{idx+1}"
-            item_content = format_item_text(item, zot, google_creds, verbose)
-            return f"{item_header}\n{item_content}\n---"
+            item_lines = format_item_text(item, zot, google_creds, verbose,
+                                          att_map.get(item.get('key'), []))
+            return [f"{collection_name} #{idx+1}"] + item_lines + ["---"]
         except Exception as e:
             error_msg = f"Error formatting item {idx+1}: {e}"
             print_progress(error_msg, verbose, file=sys.stderr)
-            return f"{error_msg}\n---"
-    
-    # Process items in parallel with ThreadPoolExecutor
-    formatted_items = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Create and submit all tasks
-        future_to_idx = {}
-        for i, item in enumerate(items):
-            future = executor.submit(format_single_item, i, item)
-            future_to_idx[future] = i
-        
-        # Process results as they complete
-        completed = 0
-        for future in concurrent.futures.as_completed(future_to_idx):
-            completed += 1
-            if verbose and (completed % 10 == 0 or completed == len(items)):
-                print_progress(f"Completed {completed}/{len(items)} items", verbose)
-            
-            # Store results with their index for later sorting
-            idx = future_to_idx[future]
-            try:
-                formatted_items.append((idx, future.result()))
-            except Exception as e:
-                error_msg = f"Error processing item {idx+1}: {e}"
-                print_progress(error_msg, verbose, file=sys.stderr)
-                formatted_items.append((idx, f"{error_msg}\n---"))
-    
-    # Sort by original index to maintain order
-    formatted_items.sort(key=lambda x: x[0])
-    ordered_items = [text for _, text in formatted_items]
-    
+            return [error_msg, "---"]
+
+    # Fast path first: no per-item exception handling. If any item blows
+    # up, redo the batch through the wrapper so the bad item is isolated
+    # and reported instead of sinking the whole run.
+    try:
+        formatted_items = [
+            [f"{collection_name} #{i+1}"]
+            + format_item_text(item, zot, google_creds, verbose,
+                               att_map.get(item.get('key'), []))
+            + ["---"]
+            for i, item in enumerate(items)]
+    except Exception:
+        formatted_items = [format_single_item(i, item) for i, item in enumerate(items)]
+
     if verbose:
         print_progress("Text output generation complete", verbose)
-    
-    # Ensure Unicode output    
-    return "\n".join(header + ordered_items)
+
+    # Single join over all line chunks; no per-item intermediate strings
+    return "\n".join(itertools.chain(header, *formatted_items))
+
+# Static page scaffolding hoisted to module scope so each invocation only
+# interpolates the title and notice instead of rebuilding ~80 lines of HTML
+_HTML_HEAD_STATIC = """<!-- KaTeX CSS -->
+<link rel='stylesheet' href='https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/katex.min.css' integrity='sha384-GvrOXuhMATgEsSwCs4smul74iXGOixntILdUW9XmUC6+HX0sLNAK3q71HotJqlAn' crossorigin='anonymous'>
+<!-- KaTeX JS -->
+<script defer src='https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/katex.min.js' integrity='sha384-cpW21h6RZv/phavutF+AuVYrr+dA8xD9zs6FwLpaCct6O9ctzYFfFr4dgmgccOTx' crossorigin='anonymous'></script>
+<!-- KaTeX auto-render extension -->
+<script defer src='https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/contrib/auto-render.min.js' integrity='sha384-+VBxd3r6XgURycqtZ117nYw44OOcIax56Z4dCRWbxyPt0Koah1uHoK0o4+/RRE05' crossorigin='anonymous'></script>
+<script>
+document.addEventListener('DOMContentLoaded', function() {
+  renderMathInElement(document.body, {
+    delimiters: [
+      {left: '$$', right: '$$', display: true},
+      {left: '$', right: '$', display: false}
+    ],
+    throwOnError: false
+  });
+});
+</script>
+<style>
+body { font-family: Arial, sans-serif; margin: 40px; }
+.item { margin-bottom: 30px; border-bottom: 1px solid #ccc; padding-bottom: 20px; }
+.item-number { font-weight: bold; color: #7f8c8d; margin-bottom: 5px; }
+h1 { color: #2c3e50; }
+h2 { color: #3498db; }
+.notice { font-style: italic; background-color: #f8f9fa; padding: 10px; border-left: 3px solid #3498db; margin-bottom: 20px; }
+.coffee-button { position: absolute; top: 20px; right: 20px; }
+.coffee-button img { height: 40px; border: none; }
+.search-container { margin-bottom: 20px; padding: 15px; background-color: #f8f9fa; border-radius: 5px; }
+#searchInput { width: 300px; padding: 8px; font-size: 16px; border: 1px solid #ccc; border-radius: 4px; }
+#searchBtn { padding: 8px 15px; background-color: #3498db; color: white; border: none; border-radius: 4px; cursor: pointer; margin-left: 10px; }
+#searchBtn:hover { background-color: #2980b9; }
+#searchCount { margin-left: 15px; font-style: italic; }
+.highlight { background-color: yellow; font-weight: bold; }
+.hidden { display: none; }
+</style>
+</head>
+<body>
+<div class='coffee-button'>
+<a href='https://www.buymeacoffee.com/hoanganhduc' target='_blank'>
+<img src='https://cdn.buymeacoffee.com/buttons/v2/default-yellow.png' alt='Buy Me A Coffee'>
+</a>
+</div>
+"""
+
+_SEARCH_CONTAINER_HTML = """<div class='search-container'>
+<input type='text' id='searchInput' placeholder='Search within this page...' />
+<button id='searchBtn'>Search</button>
+<span id='searchCount'></span>
+</div>"""
 
 def generate_html_header(title, notice=None):
     """
@@ -1020,265 +1608,189 @@ def generate_html_header(title, notice=None):
         notice (str, optional): Custom notice message. If None, uses default.
     """
     # Use default notice if none is provided
-    default_notice = "This document was automatically generated from a Zotero library. Items are listed for personal reference only. All references, articles, and other content remain the property of their respective copyright holders. This document is not for redistribution. Last updated on " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "."
-    notice_text = notice if notice is not None else default_notice
-    
-    return [
-        "<!DOCTYPE html>",
-        "<html>",
-        "<head>",
-        f"<title>{title}</title>",
-        "<!-- KaTeX CSS -->",
-        "<link rel='stylesheet' href='https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/katex.min.css' integrity='sha384-GvrOXuhMATgEsSwCs4smul74iXGOixntILdUW9XmUC6+HX0sLNAK3q71HotJqlAn' crossorigin='anonymous'>",
-        "<!-- KaTeX JS -->",
-        "<script defer src='https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/katex.min.js' integrity='sha384-cpW21h6RZv/phavutF+AuVYrr+dA8xD9zs6FwLpaCct6O9ctzYFfFr4dgmgccOTx' crossorigin='anonymous'></script>",
-        "<!-- KaTeX auto-render extension -->",
-        "<script defer src='https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/contrib/auto-render.min.js' integrity='sha384-+VBxd3r6XgURycqtZ117nYw44OOcIax56Z4dCRWbxyPt0Koah1uHoK0o4+/RRE05' crossorigin='anonymous'></script>",
-        "<script>",
-        "document.addEventListener('DOMContentLoaded', function() {",
-        "  renderMathInElement(document.body, {",
-        "    delimiters: [",
-        "      {left: '$$', right: '$$', display: true},",
-        "      {left: '$', right: '$', display: false}",
-        "    ],",
-        "    throwOnError: false",
-        "  });",
-        "});",
-        "</script>",
-        "<style>",
-        "body { font-family: Arial, sans-serif; margin: 40px; }",
-        ".item { margin-bottom: 30px; border-bottom: 1px solid #ccc; padding-bottom: 20px; }",
-        ".item-number { font-weight: bold; color: #7f8c8d; margin-bottom: 5px; }",
-        "h1 { color: #2c3e50; }",
-        "h2 { color: #3498db; }",
-        ".notice { font-style: italic; background-color: #f8f9fa; padding: 10px; border-left: 3px solid #3498db; margin-bottom: 20px; }",
-        ".coffee-button { position: absolute; top: 20px; right: 20px; }",
-        ".coffee-button img { height: 40px; border: none; }",
-        ".search-container { margin-bottom: 20px; padding: 15px; background-color: #f8f9fa; border-radius: 5px; }",
-        "#searchInput { width: 300px; padding: 8px; font-size: 16px; border: 1px solid #ccc; border-radius: 4px; }",
-        "#searchBtn { padding: 8px 15px; background-color: #3498db; color: white; border: none; border-radius: 4px; cursor: pointer; margin-left: 10px; }",
-        "#searchBtn:hover { background-color: #2980b9; }",
-        "#searchCount { margin-left: 15px; font-style: italic; }",
-        ".highlight { background-color: yellow; font-weight: bold; }",
-        ".hidden { display: none; }",
-        "</style>",
-        "</head>",
-        "<body>",
-        "<div class='coffee-button'>",
-        "<a href='https://www.buymeacoffee.com/hoanganhduc' target='_blank'>",
-        "<img src='https://cdn.buymeacoffee.com/buttons/v2/default-yellow.png' alt='Buy Me A Coffee'>",
-        "</a>",
-        "</div>",
-        f"<h1>{title}</h1>",
-        f"<div class='notice'>{notice_text}</div>"
-    ]
+    if notice is None:
+        notice = ("This document was automatically generated from a Zotero library. "
+                  "Items are listed for personal reference only. All references, articles, "
+                  "and other content remain the property of their respective copyright holders. "
+                  "This document is not for redistribution. Last updated on "
+                  + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + ".")
+    
+    return [f"<!DOCTYPE html>\n<html>\n<head>\n<title>{title}</title>\n"
+            + _HTML_HEAD_STATIC
+            + f"<h1>{title}</h1>\n<div class='notice'>{notice}</div>"]
 
 def generate_search_container():
     """Generate the search box HTML."""
-    return [
-        "<div class='search-container'>",
-        "<input type='text' id='searchInput' placeholder='Search within this page...' />",
-        "<button id='searchBtn'>Search</button>",
-        "<span id='searchCount'></span>",
-        "</div>"
-    ]
+    return [_SEARCH_CONTAINER_HTML]
 
-def format_single_item(idx, item, collection_name, zot, google_creds, verbose):
-    """Format a single item for HTML output."""
+def format_single_item(idx, item, collection_name, zot, google_creds, verbose, attachments=None):
+    """Format a single item for HTML output, returning a list of fragments."""
     try:
         item_number = f"<div class='item-number'>{collection_name} #{idx+1}</div>"
-        item_content = format_item_html(item, zot, google_creds, verbose)
-        return item_number + "\n" + item_content
+        return [item_number] + format_item_html(item, zot, google_creds, verbose, attachments)
     except Exception as e:
         error_msg = f"Error formatting item {idx+1}: {e}"
         print_progress(error_msg, verbose, file=sys.stderr)
-        return f"<div class='item-error'>{error_msg}</div>"
+        return [f"<div class='item-error'>{error_msg}</div>"]
 
 def generate_items_html(items, collection_name, zot, google_creds, verbose):
-    """Generate HTML for all items using parallel processing."""
+    """Generate HTML for all items."""
     if verbose:
-        print_progress(f"Preparing to format {len(items)} items simultaneously", verbose)
-    
-    # Process items in parallel with ThreadPoolExecutor
-    formatted_items = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Create and submit all tasks
-        future_to_idx = {}
-        for i, item in enumerate(items):
-            future = executor.submit(format_single_item, i, item, collection_name, zot, google_creds, verbose)
-            future_to_idx[future] = i
-        
-        # Process results as they complete
-        completed = 0
-        for future in concurrent.futures.as_completed(future_to_idx):
-            completed += 1
-            if verbose and (completed % 10 == 0 or completed == len(items)):
-                print_progress(f"Completed {completed}/{len(items)} items", verbose)
-            
-            # Store results with their index for later sorting
-            idx = future_to_idx[future]
-            try:
-                formatted_items.append((idx, future.result()))
-            except Exception as e:
-                error_msg = f"Error processing item {idx+1}: {e}"
-                print_progress(error_msg, verbose, file=sys.stderr)
-                formatted_items.append((idx, f"<div class='item-error'>{error_msg}</div>"))
-    
-    # Sort by original index to maintain order
-    formatted_items.sort(key=lambda x: x[0])
-    return [html_content for _, html_content in formatted_items]
+        print_progress(f"Formatting {len(items)} items", verbose)
+
+    # Resolve every attachment path and Drive URL in one bulk pass
+    att_map = get_all_attachment_paths(zot, items, google_creds, verbose)
+
+    # Fast path first: no per-item exception handling. If any item blows
+    # up, redo the batch through the wrapper so the bad item is isolated
+    # and reported instead of sinking the whole run.
+    try:
+        return list(itertools.chain.from_iterable(
+            [f"<div class='item-number'>{collection_name} #{i+1}</div>"]
+            + format_item_html(item, zot, google_creds, verbose,
+                               att_map.get(item.get('key'), []))
+            for i, item in enumerate(items)))
+    except Exception:
+        return list(itertools.chain.from_iterable(
+            format_single_item(i, item, collection_name, zot, google_creds, verbose,
+                               att_map.get(item.get('key'), []))
+            for i, item in enumerate(items)))
+
+_SEARCH_SCRIPT_HTML = r"""<script>
+document.addEventListener('DOMContentLoaded', function() {
+  const searchInput = document.getElementById('searchInput');
+  const searchBtn = document.getElementById('searchBtn');
+  const searchCount = document.getElementById('searchCount');
+  const items = document.querySelectorAll('.item');
+
+  // Lowercase each item's text once at load; searches reuse the cache
+  // instead of re-materialising DOM text on every query
+  items.forEach(item => { item.dataset.searchText = item.textContent.toLowerCase(); });
+
+  function clearHighlights(item) {
+    // Restore the cached original markup in one assignment
+    if (item.dataset.orig !== undefined) {
+      item.innerHTML = item.dataset.orig;
+    }
+  }
+
+  function highlightText(item, searchTerm) {
+    // Compile the pattern once and rewrite from the cached original HTML;
+    // the lookahead keeps matches out of tag markup
+    const escaped = searchTerm.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+    const re = new RegExp('(' + escaped + ')(?![^<]*>)', 'gi');
+    if (item.dataset.orig === undefined) {
+      item.dataset.orig = item.innerHTML;
+    }
+    item.innerHTML = item.dataset.orig.replace(re, '<span class="highlight">$1</span>');
+  }
+
+  function performSearch() {
+    const searchTerm = searchInput.value.toLowerCase().trim();
+    if (searchTerm === '') {
+      // Show all items if search is empty
+      items.forEach(item => {
+        item.classList.remove('hidden');
+        clearHighlights(item);
+      });
+      searchCount.textContent = '';
+      return;
+    }
+
+    let matchCount = 0;
+
+    // Process each item
+    items.forEach(item => {
+      if (item.dataset.searchText.includes(searchTerm)) {
+        item.classList.remove('hidden');
+        matchCount++;
+        highlightText(item, searchTerm);
+      } else {
+        item.classList.add('hidden');
+        clearHighlights(item);
+      }
+    });
+
+    // Update count display
+    searchCount.textContent = `Found ${matchCount} matching items`;
+  }
+
+  // Event listeners; typing is debounced so fast input runs one search
+  let debounceTimer;
+  searchBtn.addEventListener('click', performSearch);
+  searchInput.addEventListener('input', function() {
+    clearTimeout(debounceTimer);
+    debounceTimer = setTimeout(performSearch, 120);
+  });
+  searchInput.addEventListener('keyup', function(event) {
+    if (event.key === 'Enter') {
+      performSearch();
+    }
+  });
+});
+</script>
+</body>
+</html>"""
 
 def generate_search_script():
     """Generate the JavaScript code for search functionality."""
-    return [
-        "<script>",
-        "document.addEventListener('DOMContentLoaded', function() {",
-        "  const searchInput = document.getElementById('searchInput');",
-        "  const searchBtn = document.getElementById('searchBtn');",
-        "  const searchCount = document.getElementById('searchCount');",
-        "  const items = document.querySelectorAll('.item');",
-        "",
-        "  function performSearch() {",
-        "    const searchTerm = searchInput.value.toLowerCase().trim();",
-        "    if (searchTerm === '') {",
-        "      // Show all items if search is empty",
-        "      items.forEach(item => {",
-        "        item.classList.remove('hidden');",
-        "        // Remove any existing highlights",
-        "        const highlighted = item.querySelectorAll('.highlight');",
-        "        highlighted.forEach(el => {",
-        "          const parent = el.parentNode;",
-        "          parent.replaceChild(document.createTextNode(el.textContent), el);",
-        "          parent.normalize();",
-        "        });",
-        "      });",
-        "      searchCount.textContent = '';",
-        "      return;",
-        "    }",
-        "",
-        "    let matchCount = 0;",
-        "",
-        "    // Process each item",
-        "    items.forEach(item => {",
-        "      const text = item.textContent.toLowerCase();",
-        "      const hasMatch = text.includes(searchTerm);",
-        "      ",
-        "      // Show/hide based on match",
-        "      if (hasMatch) {",
-        "        item.classList.remove('hidden');",
-        "        matchCount++;",
-        "        ",
-        "        // Highlight matches (only in text nodes)",
-        "        highlightText(item, searchTerm);",
-        "      } else {",
-        "        item.classList.add('hidden');",
-        "      }",
-        "    });",
-        "",
-        "    // Update count display",
-        "    searchCount.textContent = `Found ${matchCount} matching items`;",
-        "  }",
-        "",
-        "  function highlightText(element, searchTerm) {",
-        "    // Remove any existing highlights first",
-        "    const highlighted = element.querySelectorAll('.highlight');",
-        "    highlighted.forEach(el => {",
-        "      const parent = el.parentNode;",
-        "      parent.replaceChild(document.createTextNode(el.textContent), el);",
-        "      parent.normalize();",
-        "    });",
-        "",
-        "    // Function to recursively process text nodes",
-        "    function processNode(node) {",
-        "      // Only process text nodes",
-        "      if (node.nodeType === 3) {",
-        "        const text = node.nodeValue.toLowerCase();",
-        "        const index = text.indexOf(searchTerm.toLowerCase());",
-        "        ",
-        "        // If search term found in this text node",
-        "        if (index >= 0) {",
-        "          const before = node.nodeValue.substring(0, index);",
-        "          const match = node.nodeValue.substring(index, index + searchTerm.length);",
-        "          const after = node.nodeValue.substring(index + searchTerm.length);",
-        "          ",
-        "          const beforeNode = document.createTextNode(before);",
-        "          const matchNode = document.createElement('span');",
-        "          matchNode.classList.add('highlight');",
-        "          matchNode.textContent = match;",
-        "          const afterNode = document.createTextNode(after);",
-        "          ",
-        "          const parent = node.parentNode;",
-        "          parent.replaceChild(afterNode, node);",
-        "          parent.insertBefore(matchNode, afterNode);",
-        "          parent.insertBefore(beforeNode, matchNode);",
-        "          ",
-        "          // Process the 'after' part too for multiple occurrences",
-        "          processNode(afterNode);",
-        "        }",
-        "      } else if (node.nodeType === 1 && node.childNodes && !/(script|style)/i.test(node.tagName)) {",
-        "        // Process children of element nodes",
-        "        Array.from(node.childNodes).forEach(child => processNode(child));",
-        "      }",
-        "    }",
-        "",
-        "    // Start processing from the item element",
-        "    processNode(element);",
-        "  }",
-        "",
-        "  // Event listeners",
-        "  searchBtn.addEventListener('click', performSearch);",
-        "  searchInput.addEventListener('keyup', function(event) {",
-        "    if (event.key === 'Enter') {",
-        "      performSearch();",
-        "    }",
-        "  });",
-        "});",
-        "</script>",
-        "</body>",
-        "</html>"
-    ]
+    return [_SEARCH_SCRIPT_HTML]
 
 def generate_html_output(items, zot, collection_name=None, google_creds=None, verbose=False, notice=None):
-    """Generate complete HTML document from items."""
+    """Generate complete HTML document from items as one string."""
+    # Stream into a StringIO: its C-level buffer grows geometrically, so
+    # peak memory is the final string rather than fragments plus join
+    buf = io.StringIO()
+    write_html_output(items, zot, buf, collection_name, google_creds, verbose, notice)
+    return buf.getvalue()
+
+def write_html_output(items, zot, out_fh, collection_name=None, google_creds=None, verbose=False, notice=None):
+    """
+    Stream the HTML document for items straight to a writable file handle.
+
+    Produces the same bytes as generate_html_output but never holds the
+    whole page in one string, so peak memory stays flat for large
+    libraries. The PDF path still needs the in-memory string and keeps
+    using generate_html_output.
+    """
     if verbose:
         print_progress("Starting HTML output generation", verbose)
-    
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    title = f"Zotero Items - {current_date}".title()
-    if collection_name:
-        title = f"Zotero Collection: {collection_name} - {current_date}".title()
-    
-    # Build HTML components
-    html_parts = []
-    html_parts.extend(generate_html_header(title, notice))  # Pass the notice parameter
-    html_parts.extend(generate_search_container())
-    
-    # Process items
-    formatted_items = generate_items_html(items, collection_name, zot, google_creds, verbose)
-    html_parts.extend(formatted_items)
-    
-    # Add search functionality
-    html_parts.extend(generate_search_script())
-    
+
+    title = _items_page_title(collection_name)
+
+    first = True
+    for chunk in itertools.chain(
+            generate_html_header(title, notice),
+            generate_search_container(),
+            generate_items_html(items, collection_name, zot, google_creds, verbose),
+            generate_search_script()):
+        if first:
+            first = False
+        else:
+            out_fh.write('\n')
+        out_fh.write(chunk)
+
     if verbose:
         print_progress("HTML output generation complete", verbose)
-    
-    return "\n".join(html_parts)
 
 def generate_pdf_output(html_content, output_file, verbose=False):
-    """Generate PDF from HTML content using pdfkit."""
+    """Generate PDF from HTML content by piping it straight to wkhtmltopdf."""
     if verbose:
         print_progress("Starting PDF generation...", verbose)
         html_size_kb = len(html_content) / 1024
-        print_progress(f"Using pdfkit to process approximately {html_size_kb:.1f} KB of HTML content", verbose)
+        print_progress(f"Piping approximately {html_size_kb:.1f} KB of HTML to wkhtmltopdf", verbose)
     
     try:
-        # Configure pdfkit options
-        options = {
-            'quiet': not verbose,
-            'encoding': "UTF-8",
-        }
-        pdfkit.from_string(html_content, output_file, options=options)
+        # Feed stdin directly instead of going through pdfkit's temp-file
+        # round-trip: the HTML is written and re-read exactly once
+        cmd = ['wkhtmltopdf', '--encoding', 'utf-8']
+        if not verbose:
+            cmd.append('--quiet')
+        cmd += ['-', output_file]
+        result = subprocess.run(cmd, input=html_content.encode('utf-8'))
+        if result.returncode != 0:
+            print_progress(f"wkhtmltopdf exited with status {result.returncode}", verbose, file=sys.stderr)
+            sys.exit(1)
         
         # Get the file size of the generated PDF
         if os.path.exists(output_file):
@@ -1288,9 +1800,24 @@ def generate_pdf_output(html_content, output_file, verbose=False):
             print_progress("PDF generation seemed to complete but output file not found", verbose, file=sys.stderr)
     
     except Exception as e:
-        print_progress(f"Error generating PDF with pdfkit: {str(e)}", verbose, file=sys.stderr)
+        print_progress(f"Error generating PDF with wkhtmltopdf: {str(e)}", verbose, file=sys.stderr)
         sys.exit(1)
 
+_COLL_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<title>Zotero Collections</title>
+<style>
+body { font-family: Arial, sans-serif; margin: 40px; }
+.collection { margin-bottom: 20px; }
+h1 { color: #2c3e50; }
+</style>
+</head>
+<body>
+<h1>Zotero Collections</h1>
+"""
+_COLL_TAIL = "</body>\n</html>"
+
 def display_collections(collections, output_format, output_file=None, verbose=False):
     """Display collections in the specified format."""
     if not collections:
@@ -1309,31 +1836,14 @@ def display_collections(collections, output_format, output_file=None, verbose=Fa
             print("---")
     elif output_format in ['html', 'pdf']:
         print_progress(f"Formatting {len(collections)} collections as HTML", verbose)
-        html = [
-            "<!DOCTYPE html>",
-            "<html>",
-            "<head>",
-            "<title>Zotero Collections</title>",
-            "<style>",
-            "body { font-family: Arial, sans-serif; margin: 40px; }",
-            ".collection { margin-bottom: 20px; }",
-            "h1 { color: #2c3e50; }",
-            "</style>",
-            "</head>",
-            "<body>",
-            "<h1>Zotero Collections</h1>"
-        ]
-        
-        for i, collection in enumerate(collections):
-            if verbose and (i % 10 == 0 or i == len(collections) - 1):
-                print_progress(f"Processing collection {i+1} of {len(collections)}", verbose)
-            html.append("<div class='collection'>")
-            html.append(f"<p><strong>Name:</strong> {collection['data']['name']}</p>")
-            html.append(f"<p><strong>Key:</strong> {collection['data']['key']}</p>")
-            html.append("</div>")
-        
-        html.extend(["</body>", "</html>"])
-        html_content = "\n".join(html)
+        # Static scaffolding plus one join over a generator: no per-row
+        # list appends and no progress checks in the loop
+        html_content = _COLL_HEAD + "\n".join(
+            f"<div class='collection'>\n"
+            f"<p><strong>Name:</strong> {c['data']['name']}</p>\n"
+            f"<p><strong>Key:</strong> {c['data']['key']}</p>\n"
+            f"</div>"
+            for c in collections) + "\n" + _COLL_TAIL
         
         if output_format == 'html':
             if output_file:
@@ -1353,6 +1863,17 @@ def display_collections(collections, output_format, output_file=None, verbose=Fa
     
     print_progress("Collection display complete", verbose)
 
+def _write_stdout(content):
+    """Write a multi-megabyte string to stdout in one binary call.
+
+    Bypasses print()'s newline concatenation and the text layer's
+    per-write encoding checks; flushes around the raw write so progress
+    messages stay ordered."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(content.encode('utf-8'))
+    sys.stdout.buffer.write(b'\n')
+    sys.stdout.buffer.flush()
+
 def display_items(items, output_format, output_file=None, collection_name=None, zot=None, verbose=False, google_creds=None, notice=None):
     """Display items in the specified format."""
     if not items:
@@ -1371,18 +1892,18 @@ def display_items(items, output_format, output_file=None, collection_name=None,
             print(f"Text output saved to {output_file}")
         else:
             print_progress("Displaying text output to console", verbose)
-            print(text_content)
+            _write_stdout(text_content)
     elif output_format == 'html':
         print_progress("Generating HTML output...", verbose)
-        html_content = generate_html_output(items, zot, collection_name, google_creds, verbose, notice)
         if output_file:
             print_progress(f"Saving HTML output to {output_file}", verbose)
+            # Stream straight to disk instead of building one giant string
             with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+                write_html_output(items, zot, f, collection_name, google_creds, verbose, notice)
             print(f"HTML output saved to {output_file}")
         else:
             print_progress("Displaying HTML output to console", verbose)
-            print(html_content)
+            _write_stdout(generate_html_output(items, zot, collection_name, google_creds, verbose, notice))
     elif output_format == 'pdf':
         print_progress("Generating PDF output...", verbose)
         html_content = generate_html_output(items, zot, collection_name, google_creds, verbose, notice)
@@ -1394,7 +1915,76 @@ def display_items(items, output_format, output_file=None, collection_name=None,
     
     print_progress("Item display complete", verbose)
 
-def search_sqlite_db(sqlite_path, queries, item_type, max_results, verbose):
+def _ensure_titles_fts(conn):
+    """
+    Build a temporary FTS5 index over title values on this connection.
+
+    The main database is opened immutable, so the index lives in the
+    writable temp schema. Building costs one scan of the title rows;
+    every MATCH afterwards is O(matches) instead of a full LIKE scan.
+
+    Returns:
+        bool: True when the index is available, False if FTS5 is missing
+    """
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.titles_fts "
+                     "USING fts5(itemID UNINDEXED, title, tokenize='unicode61')")
+        if conn.execute("SELECT count(*) FROM temp.titles_fts").fetchone()[0] == 0:
+            conn.execute("""
+                INSERT INTO temp.titles_fts
+                SELECT itemData.itemID, itemDataValues.value
+                FROM itemData
+                JOIN fields ON itemData.fieldID = fields.fieldID
+                JOIN itemDataValues ON itemData.valueID = itemDataValues.valueID
+                WHERE fields.fieldName = 'title'
+            """)
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def _fts_match_expression(queries):
+    """
+    Turn user substring queries into one FTS5 MATCH expression.
+
+    Each query becomes a quoted prefix phrase; queries are OR-ed
+    together. Returns None when any query has no usable tokens, in
+    which case the caller should fall back to LIKE.
+    """
+    groups = []
+    for query in queries:
+        if query.startswith('^'):
+            # Anchored searches need LIKE 'q%' semantics; FTS cannot
+            # express "phrase at start of title"
+            return None
+        phrase = ' '.join(query.replace('%', ' ').split())
+        if not phrase:
+            return None
+        groups.append('"' + phrase.replace('"', '""') + '" *')
+    return ' OR '.join(groups)
+
+def _escape_like(term):
+    """
+    Escape LIKE metacharacters in a user-supplied search term.
+
+    Without this a term containing '%' or '_' is silently treated as a
+    wildcard, which both returns wrong matches and defeats the prefix
+    optimization. Pairs with ESCAPE '\\' in the statement.
+    """
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _like_pattern(query):
+    """
+    Build the LIKE pattern for one search term.
+
+    A leading '^' anchors the term to the start of the title, producing
+    a 'q%' pattern that SQLite's LIKE optimization can turn into an
+    index range scan; anything else stays a substring match.
+    """
+    if query.startswith('^'):
+        return _escape_like(query[1:]) + '%'
+    return '%' + _escape_like(query) + '%'
+
+def search_sqlite_db(sqlite_path, queries, item_type, max_results, verbose, exclude_keys=None):
     """
     Search for papers in a Zotero SQLite database.
     
@@ -1404,47 +1994,107 @@ def search_sqlite_db(sqlite_path, queries, item_type, max_results, verbose):
         item_type (str, optional): Filter by item type
         max_results (int): Maximum results per query
         verbose (bool): Whether to display progress messages
+        exclude_keys (iterable, optional): Item keys to leave out of the
+            results, e.g. keys another search backend already returned
         
     Returns:
         list: List of matching Zotero items
     """
     results = []
-    seen_keys = set()
     try:
-        conn = sqlite3.connect(sqlite_path)
-        conn.row_factory = sqlite3.Row
+        conn = open_zotero_db(sqlite_path)
         cur = conn.cursor()
-        for query in queries:
+
+        # Exclusions go through a temp table so the statement text stays
+        # identical whether or not any keys are excluded; the table lives
+        # in the temp schema because the database itself is read-only
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS excluded_keys (key TEXT PRIMARY KEY)")
+        if exclude_keys:
+            cur.executemany("INSERT OR IGNORE INTO excluded_keys VALUES (?)",
+                            ((key,) for key in exclude_keys))
+        if verbose:
+            terms = ", ".join(f"'{q}'" for q in queries)
+            print_progress(f"Searching zotero.sqlite for {terms}...", verbose)
+
+        cap = max_results * len(queries)
+
+        # The FTS5 index cheaply pre-seeds results with prefix-phrase
+        # hits, but it cannot see mid-word substrings, so the LIKE scan
+        # below still runs for every term; FTS hits go into the
+        # exclusion table so the union carries no duplicates.
+        if _ensure_titles_fts(conn):
+            # The type filter and limit are bound as parameters so the
+            # statement text never changes and sqlite's prepared-statement
+            # cache gets a hit on every call
             sql = """
-                SELECT items.itemID, items.key, itemType.typeName, itemDataValues.value as title
-                FROM items
+                SELECT items.itemID, items.key, itemType.typeName, t.title as title
+                FROM temp.titles_fts AS t
+                JOIN items ON items.itemID = t.itemID
                 JOIN itemTypes as itemType ON items.itemTypeID = itemType.itemTypeID
-                JOIN itemData ON items.itemID = itemData.itemID
-                JOIN fields ON itemData.fieldID = fields.fieldID
-                JOIN itemDataValues ON itemData.valueID = itemDataValues.valueID
-                WHERE fields.fieldName = 'title' AND itemDataValues.value LIKE ?
+                WHERE t.title MATCH ?
                 AND items.itemID NOT IN (SELECT itemID FROM deletedItems)
+                AND items.key NOT IN (SELECT key FROM temp.excluded_keys)
                 AND itemType.typeName NOT IN ('note', 'attachment')
+                AND (? IS NULL OR itemType.typeName = ?)
+                LIMIT ?
             """
-            params = [f"%{query}%"]
-            if item_type:
-                sql += " AND itemType.typeName = ?"
-                params.append(item_type)
-            sql += " LIMIT ?"
-            params.append(max_results)
-            if verbose:
-                print_progress(f"Searching local zotero.sqlite for '{query}'...", verbose)
-            for row in cur.execute(sql, params):
-                key = row['key']
-                if key not in seen_keys:
+            seen_keys = set()
+            for query in queries:
+                match_expr = _fts_match_expression([query])
+                if not match_expr:
+                    continue
+                for row in cur.execute(sql, [match_expr, item_type, item_type, max_results]):
+                    if row['key'] in seen_keys:
+                        continue
+                    seen_keys.add(row['key'])
                     results.append({
-                        'key': key,
+                        'key': row['key'],
                         'data': {
                             'title': row['title'],
                             'itemType': row['typeName']
                         }
                     })
-                    seen_keys.add(key)
+            if seen_keys:
+                cur.executemany("INSERT OR IGNORE INTO excluded_keys VALUES (?)",
+                                ((key,) for key in seen_keys))
+        if len(results) >= cap:
+            conn.close()
+            return results
+
+        # One statement for all search terms: the five-way join and its
+        # index setup run once instead of once per query. The statement
+        # text only varies with the number of terms, so repeated searches
+        # with the same term count reuse the cached prepared statement.
+        like_clause = " OR ".join(["itemDataValues.value LIKE ? ESCAPE '\\'"] * len(queries))
+        sql = f"""
+            SELECT items.itemID, items.key, itemType.typeName, itemDataValues.value as title
+            FROM items
+            JOIN itemTypes as itemType ON items.itemTypeID = itemType.itemTypeID
+            JOIN itemData ON items.itemID = itemData.itemID
+            JOIN fields ON itemData.fieldID = fields.fieldID
+            JOIN itemDataValues ON itemData.valueID = itemDataValues.valueID
+            WHERE fields.fieldName = 'title' AND ({like_clause})
+            AND items.itemID NOT IN (SELECT itemID FROM deletedItems)
+            AND items.key NOT IN (SELECT key FROM temp.excluded_keys)
+            AND itemType.typeName NOT IN ('note', 'attachment')
+            AND (? IS NULL OR itemType.typeName = ?)
+            LIMIT ?
+        """
+        params = [_like_pattern(query) for query in queries]
+        params += [item_type, item_type, cap - len(results)]
+        # The per-query LIMIT becomes an overall cap (bound above, net of
+        # the FTS hits). The scan emits each title row once even when
+        # several terms match it, and FTS hits sit in the exclusion
+        # table, so no Python-side dedup set (and no SQL DISTINCT sort)
+        # is needed.
+        for row in cur.execute(sql, params):
+            results.append({
+                'key': row['key'],
+                'data': {
+                    'title': row['title'],
+                    'itemType': row['typeName']
+                }
+            })
         conn.close()
     except Exception as e:
         print_progress(f"Error searching SQLite database: {e}", verbose, file=sys.stderr)
@@ -1463,25 +2113,17 @@ def search_local_sqlite(queries, item_type, max_results, verbose):
     Returns:
         list: List of matching Zotero items
     """
-    local_paths = [
-        os.path.expanduser("~/Zotero/zotero.sqlite"),
-        os.path.expanduser("~/Library/Application Support/Zotero/zotero.sqlite"),
-        os.path.expanduser("~/.zotero/zotero.sqlite"),
-        "./zotero.sqlite"
-    ]
-    
-    for path in local_paths:
-        if os.path.exists(path):
-            if verbose:
-                print_progress(f"Found local zotero.sqlite at {path}", verbose)
-            results = search_sqlite_db(path, queries, item_type, max_results, verbose)
-            if results:
-                return results
-            break  # Only use first found
+    path = _local_zotero_sqlite_path()
+    if path:
+        if verbose:
+            print_progress(f"Found local zotero.sqlite at {path}", verbose)
+        results = search_sqlite_db(path, queries, item_type, max_results, verbose)
+        if results:
+            return results
     
     return []
 
-def search_drive_sqlite(queries, item_type, max_results, verbose):
+def search_drive_sqlite(queries, item_type, max_results, verbose, google_creds=None):
     """
     Download and search Zotero SQLite database from Google Drive.
     
@@ -1490,39 +2132,22 @@ def search_drive_sqlite(queries, item_type, max_results, verbose):
         item_type (str, optional): Filter by item type
         max_results (int): Maximum results per query
         verbose (bool): Whether to display progress messages
+        google_creds: Google API credentials object (optional)
         
     Returns:
         list: List of matching Zotero items
     """
-    google_creds = globals().get('google_creds', None)
     if not google_creds:
         if verbose:
             print_progress("No Google Drive credentials available for search", verbose)
         return []
-        
-    drive_url = get_drive_url_by_filename(google_creds, "zotero.sqlite", exact_match=True, verbose=verbose)
-    if not drive_url:
-        return []
-        
-    file_id = extract_file_id_from_drive_url(drive_url)
-    if not file_id:
-        return []
-        
-    drive_service = build('drive', 'v3', credentials=google_creds)
-    temp_path = download_file_from_drive(drive_service, file_id, verbose=verbose)
-    
+
+    temp_path = _cached_zotero_sqlite(google_creds, verbose)
+
     if not temp_path or not os.path.exists(temp_path):
         return []
-        
-    results = search_sqlite_db(temp_path, queries, item_type, max_results, verbose)
-    
-    # Clean up temp file
-    try:
-        os.remove(temp_path)
-    except Exception:
-        pass
-        
-    return results
+
+    return search_sqlite_db(temp_path, queries, item_type, max_results, verbose)
 
 def search_zotero_api(zot, queries, item_type, max_results, verbose):
     """
@@ -1541,36 +2166,42 @@ def search_zotero_api(zot, queries, item_type, max_results, verbose):
     if verbose:
         print_progress("Searching online Zotero library via API...", verbose)
         
-    all_results = []
-    all_item_keys = set()
+    # Dedup across queries by item key; setdefault keeps the first
+    # occurrence and dict preserves insertion order
+    merged = {}
     
     try:
         for query in queries:
             if verbose and len(queries) > 1:
                 print_progress(f"Searching for title: '{query}'", verbose)
                 
-            params = {'q': query, 'limit': max_results}
+            # qmode restricts matching server-side to title/creator/year,
+            # and an explicit item type is forwarded as a real filter. The
+            # attachment/note exclusion stays client-side: Zotero's
+            # itemType syntax cannot express "neither attachment nor note"
+            # in one expression.
+            kwargs = {'q': query, 'limit': max_results, 'qmode': 'titleCreatorYear'}
             if item_type:
-                params['itemType'] = item_type
+                kwargs['itemType'] = item_type
                 
-            results = zot.items(params=params)
-            
-            for item in results:
-                if (item['data'].get('itemType') not in ['attachment', 'note'] and
-                    item['key'] not in all_item_keys):
-                    all_results.append(item)
-                    all_item_keys.add(item['key'])
+            for item in zot.items(**kwargs):
+                if item['data'].get('itemType') in ('attachment', 'note'):
+                    continue
+                merged.setdefault(item['key'], item)
                     
         if verbose:
-            print_progress(f"Found {len(all_results)} unique matching papers", verbose)
+            print_progress(f"Found {len(merged)} unique matching papers", verbose)
             
-        return all_results
+        return list(merged.values())
         
     except Exception as e:
         print_progress(f"Error searching online: {e}", verbose, file=sys.stderr)
         return []
 
-def find_papers_by_title(zot, title_query, item_type=None, max_results=10, verbose=False):
+# Process-lifetime cache of search results, keyed on the search terms
+_find_papers_cache = {}
+
+def find_papers_by_title(zot, title_query, item_type=None, max_results=10, verbose=False, google_creds=None):
     """
     Search for papers in Zotero library by title or partial title.
     Priority:
@@ -1584,6 +2215,7 @@ def find_papers_by_title(zot, title_query, item_type=None, max_results=10, verbo
         item_type (str, optional): Filter by item type (e.g., 'journalArticle')
         max_results (int): Maximum number of results to return per search term
         verbose (bool): Whether to display progress messages
+        google_creds: Google API credentials object (optional)
         
     Returns:
         list: List of matching Zotero items
@@ -1594,16 +2226,28 @@ def find_papers_by_title(zot, title_query, item_type=None, max_results=10, verbo
     else:
         title_queries = title_query
 
+    # Repeated searches (e.g. the same -S flag across runs in one process)
+    # are answered from a per-process cache instead of re-querying the
+    # backends. A plain dict rather than lru_cache, because zot and
+    # google_creds are unhashable context rather than part of the key.
+    cache_key = (tuple(title_queries), item_type, max_results)
+    if cache_key in _find_papers_cache:
+        if verbose:
+            print_progress("Returning cached search results", verbose)
+        return _find_papers_cache[cache_key]
+
     # Try each search method in order
-    for search_method in [search_local_sqlite, search_drive_sqlite, 
+    for search_method in [search_local_sqlite,
+                         lambda q, it, mr, v: search_drive_sqlite(q, it, mr, v, google_creds),
                          lambda q, it, mr, v: search_zotero_api(zot, q, it, mr, v)]:
         results = search_method(title_queries, item_type, max_results, verbose)
         if results:
+            _find_papers_cache[cache_key] = results
             return results
             
     return []
 
-def download_file_from_drive(drive_service, file_id, output_path=None, verbose=False):
+def download_file_from_drive(drive_service, file_id, output_path=None, verbose=False, http=None, file_name=None):
     """
     Download a file from Google Drive by its ID.
     
@@ -1612,6 +2256,8 @@ def download_file_from_drive(drive_service, file_id, output_path=None, verbose=F
         file_id (str): ID of the file to download
         output_path (str, optional): Path where to save the file (if None, uses temp file)
         verbose (bool): Whether to display progress messages
+        http: Optional per-thread HTTP object (the service's own http is not thread-safe)
+        file_name (str, optional): Known filename; skips the metadata request
         
     Returns:
         str: Path to the downloaded file, or None if download failed
@@ -1620,32 +2266,40 @@ def download_file_from_drive(drive_service, file_id, output_path=None, verbose=F
         if verbose:
             print_progress(f"Downloading file ID: {file_id}...", verbose)
             
-        # Get file metadata to get the filename
-        file_metadata = drive_service.files().get(fileId=file_id).execute()
-        file_name = file_metadata.get('name', 'unknown_file')
-        
-        # Create a BytesIO object for the download
-        request = drive_service.files().get_media(fileId=file_id)
-        file_buffer = io.BytesIO()
-        downloader = MediaIoBaseDownload(file_buffer, request)
+        # Get file metadata for the filename, unless the caller already has it
+        if file_name is None:
+            file_metadata = drive_service.files().get(fileId=file_id).execute(http=http)
+            file_name = file_metadata.get('name', 'unknown_file')
         
-        # Download the file
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-            if verbose and status.progress() > 0:
-                print_progress(f"Download progress: {int(status.progress() * 100)}%", verbose)
-        
-        # Determine output path
+        # Determine output path before downloading so chunks stream
+        # straight to disk instead of accumulating in a BytesIO buffer
         if output_path is None:
             suffix = '.' + file_name.split('.')[-1] if '.' in file_name else ''
             temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
             output_path = temp_file.name
             temp_file.close()
         
-        # Write the file content to disk
+        # Stream the download into the destination file; the default 1MB
+        # chunk size throttles throughput on large files like zotero.sqlite
+        request = drive_service.files().get_media(fileId=file_id)
+        if http is not None:
+            request.http = http
         with open(output_path, 'wb') as f:
-            f.write(file_buffer.getvalue())
+            downloader = MediaIoBaseDownload(f, request, chunksize=16 * 1024 * 1024)
+            done = False
+            last_logged = 0
+            while not done:
+                status, done = downloader.next_chunk()
+                percent = int(status.progress() * 100)
+                # Log at most every 25% so progress output doesn't flood
+                # the terminal on downloads with many chunks
+                if verbose and (percent - last_logged >= 25 or done):
+                    print_progress(f"Download progress: {percent}%", verbose)
+                    last_logged = percent
+            if hasattr(os, 'posix_fadvise'):
+                # Keep the pages resident for the sqlite open that follows,
+                # so it reads from the warm page cache instead of the disk
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
             
         if verbose:
             print_progress(f"File downloaded to {output_path}", verbose)
@@ -1656,6 +2310,43 @@ def download_file_from_drive(drive_service, file_id, output_path=None, verbose=F
         print_progress(f"Error downloading file: {e}", verbose, file=sys.stderr)
         return None
 
+def get_drive_files_metadata(drive_service, file_ids, verbose=False):
+    """
+    Fetch name and size for several Drive files in one batch request.
+    
+    Args:
+        drive_service: Google Drive service instance
+        file_ids (list): Drive file IDs to look up
+        verbose (bool): Whether to display progress messages
+        
+    Returns:
+        dict: Mapping of file ID to {'name': str, 'size': int}; IDs whose
+              lookup failed are absent
+    """
+    metadata = {}
+    
+    def callback(request_id, response, exception):
+        if exception is None and response:
+            metadata[request_id] = {
+                'name': response.get('name', 'unknown_file'),
+                'size': int(response.get('size', 0))
+            }
+    
+    try:
+        batch = drive_service.new_batch_http_request(callback=callback)
+        for file_id in file_ids:
+            batch.add(drive_service.files().get(fileId=file_id, fields='name,size'),
+                      request_id=file_id)
+        batch.execute()
+    except Exception as e:
+        print_progress(f"Error fetching file metadata: {e}", verbose, file=sys.stderr)
+    return metadata
+
+# Drive URL shapes that carry a file ID, compiled once
+_DRIVE_FILE_RE = re.compile(r'/file/d/([^/]+)')
+_DRIVE_ID_RE = re.compile(r'[?&]id=([^&]+)')
+_DRIVE_DOC_RE = re.compile(r'/document/d/([^/]+)')
+
 def extract_file_id_from_drive_url(drive_url):
     """
     Extract the file ID from a Google Drive URL.
@@ -1669,24 +2360,15 @@ def extract_file_id_from_drive_url(drive_url):
     if not drive_url:
         return None
         
-    # Format: https://drive.google.com/file/d/{fileid}/view
-    file_match = re.search(r'/file/d/([^/]+)', drive_url)
-    if file_match:
-        return file_match.group(1)
-        
-    # Format: https://drive.google.com/open?id={fileid}
-    id_match = re.search(r'[?&]id=([^&]+)', drive_url)
-    if id_match:
-        return id_match.group(1)
-    
-    # Format: https://docs.google.com/document/d/{fileid}/edit
-    docs_match = re.search(r'/document/d/([^/]+)', drive_url)
-    if docs_match:
-        return docs_match.group(1)
+    # .../file/d/{fileid}/view, ...open?id={fileid}, .../document/d/{fileid}/edit
+    for pattern in (_DRIVE_FILE_RE, _DRIVE_ID_RE, _DRIVE_DOC_RE):
+        match = pattern.search(drive_url)
+        if match:
+            return match.group(1)
     
     return None
 
-def send_email_with_attachments(username, app_password, to_emails, subject, body, attachments=None, verbose=False):
+def send_email_with_attachments(username, app_password, to_emails, subject, body, attachments=None, verbose=False, server=None):
     """
     Send an email with attachments using Gmail.
     
@@ -1698,6 +2380,9 @@ def send_email_with_attachments(username, app_password, to_emails, subject, body
         body (str): Email body
         attachments (list, optional): List of file paths to attach
         verbose (bool): Whether to display progress messages
+        server (smtplib.SMTP, optional): Already-authenticated SMTP connection
+            to reuse; callers sending several emails avoid one TLS handshake
+            and login per message. Left open for the caller to close.
         
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -1724,13 +2409,11 @@ def send_email_with_attachments(username, app_password, to_emails, subject, body
             for file_path in attachments:
                 if os.path.exists(file_path):
                     try:
-                        with open(file_path, 'rb') as attachment:
-                            part = MIMEBase('application', 'octet-stream')
-                            part.set_payload(attachment.read())
-                            
-                        # Encode file in ASCII characters and add header
-                        encoders.encode_base64(part)
                         filename = os.path.basename(file_path)
+                        with open(file_path, 'rb') as attachment:
+                            # MIMEApplication base64-encodes the payload in
+                            # one step instead of a separate encoder pass
+                            part = MIMEApplication(attachment.read(), Name=filename)
                         part.add_header('Content-Disposition', f'attachment; filename= {filename}')
                         msg.attach(part)
                         
@@ -1739,15 +2422,20 @@ def send_email_with_attachments(username, app_password, to_emails, subject, body
                     except Exception as e:
                         print_progress(f"Error attaching {file_path}: {e}", verbose, file=sys.stderr)
         
-        # Connect to Gmail's SMTP server
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(username, app_password)
-        
-        # Send email
-        text = msg.as_string()
-        server.sendmail(username, to_emails, text)
-        server.quit()
+        # Connect to Gmail's SMTP server unless the caller passed a live
+        # connection to reuse
+        own_server = server is None
+        if own_server:
+            # Implicit TLS on 465 saves the extra STARTTLS round trip of
+            # port 587; the timeout keeps a dead server from hanging the run
+            server = smtplib.SMTP_SSL('smtp.gmail.com', 465, timeout=30)
+            server.login(username, app_password)
+        
+        # Send email; send_message serializes the message internally
+        # without building an intermediate string copy
+        server.send_message(msg, username, to_emails)
+        if own_server:
+            server.quit()
         
         if verbose:
             print_progress("Email sent successfully", verbose)
@@ -1794,19 +2482,27 @@ def send_paper_by_email(zot, google_creds, title_query, gmail_username, gmail_ap
         if verbose:
             print_progress("Selecting a random journal article...", verbose)
         
-        # Get a list of journal articles
+        # Ask the API for one item at a random offset instead of fetching
+        # the whole library just to pick a single entry
         try:
-            # Get all journal articles
-            all_papers = get_items(zot, item_type="journalArticle", verbose=verbose)
+            try:
+                total = zot.count_items()
+                if total:
+                    papers = zot.items(start=random.randrange(total), limit=1,
+                                       itemType='journalArticle')
+            except Exception:
+                papers = []
             
-            # Make sure we have papers
-            if all_papers:
-                # Select one randomly
-                paper = random.choice(all_papers)
-                papers = [paper]
-                
+            if not papers:
+                # Random offset fetch unavailable (e.g. offline sqlite
+                # fallback) or landed on a gap; fall back to the full listing
+                all_papers = get_items(zot, item_type="journalArticle", verbose=verbose, google_creds=google_creds)
+                if all_papers:
+                    papers = [random.choice(all_papers)]
+            
+            if papers:
                 if verbose:
-                    print_progress(f"Selected random paper: '{paper['data'].get('title', 'Unknown')}'", verbose)
+                    print_progress(f"Selected random paper: '{papers[0]['data'].get('title', 'Unknown')}'", verbose)
             else:
                 print_progress("No journal articles found in the library", verbose, file=sys.stderr)
                 return False
@@ -1826,7 +2522,7 @@ def send_paper_by_email(zot, google_creds, title_query, gmail_username, gmail_ap
             print_progress(f"Searching for papers: {query_desc}...", verbose)
         
         # Find the papers in Zotero
-        papers = find_papers_by_title(zot, title_queries, verbose=verbose)
+        papers = find_papers_by_title(zot, title_queries, verbose=verbose, google_creds=google_creds)
         if not papers:
             print_progress(f"No papers found matching titles", verbose, file=sys.stderr)
             return False
@@ -1842,11 +2538,12 @@ def send_paper_by_email(zot, google_creds, title_query, gmail_username, gmail_ap
         return False
     
     # Set up Google Drive service
-    drive_service = build('drive', 'v3', credentials=google_creds)
+    drive_service = get_drive_service(google_creds)
     
     # Process papers and download attachments
     downloaded_files = []
     paper_info_list = []
+    download_jobs = []
     total_size = 0
     
     for paper in papers:
@@ -1898,33 +2595,62 @@ def send_paper_by_email(zot, google_creds, title_query, gmail_username, gmail_ap
                 'success': False
             }
             
-            # Download the file
-            try:
-                downloaded_file = download_file_from_drive(drive_service, file_id, verbose=verbose)
+            download_jobs.append((attachment_item, file_id))
+            paper_info['attachments'].append(attachment_item)
+        
+        if paper_info['attachments']:
+            paper_info_list.append(paper_info)
+    
+    # One batch request resolves every attachment's name and size instead
+    # of a metadata round trip per file inside each download
+    file_metadata = get_drive_files_metadata(
+        drive_service, [file_id for _, file_id in download_jobs], verbose=verbose)
+    
+    # Download all attachments in parallel; each worker gets its own HTTP
+    # object because the service's underlying http is not thread-safe
+    def download_job(job):
+        attachment_item, file_id = job
+        try:
+            return download_file_from_drive(drive_service, file_id, verbose=verbose,
+                                            http=_thread_local_http(google_creds),
+                                            file_name=file_metadata.get(file_id, {}).get('name'))
+        except Exception as e:
+            if verbose:
+                print_progress(f"Error downloading {attachment_item['filename']}: {e}",
+                               verbose, file=sys.stderr)
+            return None
+    
+    # The batched sizes tell us up front whether the attachments fit in an
+    # email; past the 20MB limit the downloads would be thrown away, so
+    # skip them and send Drive links instead
+    size_limit = 20 * 1024 * 1024
+    estimated_size = sum(meta.get('size', 0) for meta in file_metadata.values())
+    exceed_size_limit = estimated_size > size_limit
+    
+    if exceed_size_limit:
+        if verbose:
+            print_progress(
+                f"Attachments total {estimated_size / (1024 * 1024):.1f}MB, "
+                "over the 20MB email limit; sending links instead", verbose)
+    elif download_jobs:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(download_jobs))) as executor:
+            for job, downloaded_file in zip(download_jobs, executor.map(download_job, download_jobs)):
                 if downloaded_file:
+                    attachment_item = job[0]
                     downloaded_files.append(downloaded_file)
                     attachment_item['path'] = downloaded_file
                     attachment_item['size'] = os.path.getsize(downloaded_file)
                     attachment_item['success'] = True
                     total_size += attachment_item['size']
-            except Exception as e:
-                if verbose:
-                    print_progress(f"Error downloading {filename}: {e}", verbose, file=sys.stderr)
-            
-            paper_info['attachments'].append(attachment_item)
-        
-        if paper_info['attachments']:
-            paper_info_list.append(paper_info)
+        # Re-check with the actual on-disk sizes in case the metadata
+        # under-reported (e.g. missing size fields)
+        exceed_size_limit = total_size > size_limit
     
     # If no attachments were found, exit
     if not paper_info_list:
         print_progress("No attachments found", verbose, file=sys.stderr)
         return False
     
-    # Check size limits (20MB)
-    size_limit = 20 * 1024 * 1024
-    exceed_size_limit = total_size > size_limit
-    
     # Prepare email content
     if not subject:
         if len(paper_info_list) == 1:
@@ -2042,8 +2768,6 @@ def parse_arguments():
     return parser.parse_args()
 
 def main():
-    # For functions that access google_creds from global scope
-    global google_creds
     google_creds = None
     
     try:
@@ -2103,7 +2827,7 @@ def main():
         # Handle regular search (without email)
         elif args.searches:
             print_progress(f"Searching for papers...", args.verbose)
-            papers = find_papers_by_title(zot, args.searches, args.item_type, verbose=args.verbose)
+            papers = find_papers_by_title(zot, args.searches, args.item_type, verbose=args.verbose, google_creds=google_creds)
             if papers:
                 print_progress(f"Found {len(papers)} papers", args.verbose)
                 search_desc = f"Search results for {', '.join(args.searches)}"
@@ -2117,11 +2841,11 @@ def main():
         # List collections or items
         elif args.list_collections:
             print_progress("Fetching collections...", args.verbose)
-            collections = list_collections(zot)
+            collections = list_collections(zot, google_creds)
             display_collections(collections, args.output_format, args.output_file, args.verbose)
         else:
             print_progress("Fetching items...", args.verbose)
-            items = get_items(zot, args.collection, args.item_type, args.verbose)
+            items = get_items(zot, args.collection, args.item_type, args.verbose, google_creds)
             
             # Get collection name if a collection ID was provided
             collection_name = None